@@ -46,7 +46,8 @@ class BilibiliParser:
         # 移动链接
         elif m := re.search(r'(b23.tv\/\w{7})', self.url):
             short_url = f"https://{m.group()}"
-            final_url = Downloader()._get_final_url(short_url, max_redirects=1, return_flag="bilibili.com/video")
+            with Downloader() as downloader:
+                final_url = downloader._get_final_url(short_url, max_redirects=1, return_flag="bilibili.com/video")
             self.url = final_url
             self._parse_url()
         # 番剧链接
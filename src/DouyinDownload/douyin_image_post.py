@@ -17,7 +17,7 @@ from DouyinDownload.exceptions import ParseError
 from DouyinDownload.models import ImageOptions, Image, AudioOptions
 from DouyinDownload.parser import DouyinParser
 from DouyinDownload.config import DOWNLOAD_HEADERS
-from TelegramBot.config import DOUYIN_DOWNLOAD_THREADS, DOUYIN_SESSION_COUNTS, DOUYIN_SAVE_DIR
+from TelegramBot.config import DOUYIN_DOWNLOAD_THREADS, DOUYIN_SAVE_DIR
 
 log = logging.getLogger(__name__)
 
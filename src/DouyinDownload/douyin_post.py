@@ -6,7 +6,9 @@ Defines the core business class, DouyinPost, which encapsulates all operations f
 import json
 import os
 import re
+import threading
 import time
+from dataclasses import asdict
 from datetime import datetime
 from typing import List, Optional, Union
 
@@ -17,11 +19,16 @@ from PublicMethods.m_download import Downloader
 from DouyinDownload.exceptions import ParseError
 from DouyinDownload.models import VideoOption, AudioOptions
 from DouyinDownload.parser import DouyinParser
-from TelegramBot.config import DOUYIN_DOWNLOAD_THREADS, DOUYIN_SESSION_COUNTS
+from TelegramBot.config import DOUYIN_DOWNLOAD_THREADS
 import logging
 
 log = logging.getLogger(__name__)
 
+# 短链接 -> 内容类型 ("video" / "image")。同一短链接指向的作品不会变，命中后省掉一整条 HEAD 重定向链
+_CONTENT_TYPE_CACHE: dict[str, str] = {}
+_CONTENT_TYPE_CACHE_SIZE = 512
+_CONTENT_TYPE_LOCK = threading.Lock()  # get_content_type 在 asyncio.to_thread 的工作线程里并发调用
+
 
 class DouyinPost:
     """
@@ -115,6 +122,18 @@ class DouyinPost:
         通过 HEAD 请求重定向地址判断给定短链接指向的内容类型 (video 或 image_album)。
         Returns: "video", "image_album", or "unknown"
         """
+        if cached := _CONTENT_TYPE_CACHE.get(short_url):
+            log.debug(f"内容类型命中缓存: {cached}")
+            return cached
+        content_type = self._resolve_content_type(short_url)
+        if content_type != "unknown":  # 失败多为临时网络问题，不缓存
+            with _CONTENT_TYPE_LOCK:
+                if len(_CONTENT_TYPE_CACHE) >= _CONTENT_TYPE_CACHE_SIZE:
+                    _CONTENT_TYPE_CACHE.pop(next(iter(_CONTENT_TYPE_CACHE)))  # 淘汰最早写入的一条
+                _CONTENT_TYPE_CACHE[short_url] = content_type
+        return content_type
+
+    def _resolve_content_type(self, short_url: str) -> str:
         try:
             # 不能没有头，第二条会成功；也不能有准确的头，第三台跳会444，所以设置模糊头
             headers = DOWNLOAD_HEADERS
@@ -472,8 +491,7 @@ class DouyinPost:
             if i == 2:
                 time.sleep(5)
             try:
-                self.downloader.download(option.url, out_path, timeout=timeout, multi_session=True,
-                                         session_pool_size=DOUYIN_SESSION_COUNTS)
+                self.downloader.download(option.url, out_path, timeout=timeout)
                 break
             except Exception as e:
                 log.error(f"{i+1} - 下载失败,继续重试. 异常信息:{e}")
@@ -509,7 +527,7 @@ class DouyinPost:
                 "video_title": self.video_title,
                 "fetched_at": datetime.now().isoformat(),
                 # 将 VideoOption 对象转换为字典
-                "raw_video_options": [vars(opt) for opt in self.raw_video_options]
+                "raw_video_options": [asdict(opt) for opt in self.raw_video_options]
             }
         }
         try:
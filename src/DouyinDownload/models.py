@@ -7,7 +7,7 @@ from dataclasses import dataclass
 from typing import Optional, Any, Dict, List
 
 
-@dataclass
+@dataclass(slots=True)
 class VideoOption:
     """
     封装单个视频下载选项的所有信息。
@@ -39,7 +39,7 @@ class VideoOption:
             f"<VideoOption resolution={self.resolution}p, "
             f"bit_rate={self.bit_rate}, size={size_str}, url='{self.url}'>"
         )
-@dataclass
+@dataclass(slots=True)
 class ImageOptions:
     """
     封装单个视频下载选项的所有信息。
@@ -6,23 +6,64 @@ Responsible for parsing detailed video information from a Douyin URL.
 import json
 import re
 import time
-from typing import Dict, Any, List, Optional, Coroutine
-
-import requests
-from bs4 import BeautifulSoup
-from playwright.async_api import Page
+from typing import Dict, Any, List, Optional, Coroutine, TYPE_CHECKING
 
 from DouyinDownload.config import AWEME_DETAIL_API_URL, PLAYWRIGHT_TIMEOUT, IMAGES_NEED_COOKIES, DOWNLOAD_HEADERS
 from DouyinDownload.exceptions import URLExtractionError, ParseError
 from DouyinDownload.models import VideoOption, ImageOptions, AudioOptions
 import logging
 from TelegramBot.config import DOUYIN_PARSE_IMAGE_TIMEOUT, DOUYIN_PARSE_VIDEO_TIMEOUT
-from PublicMethods.tools import prepared_to_curl
-from PublicMethods.playwrigth_manager import PlaywrightManager
+from PublicMethods.tools import prepared_to_curl, json_loads
 from PublicMethods.functool_timeout import retry_on_timeout_async
 
+if TYPE_CHECKING:
+    from playwright.async_api import Page
+
+# playwright / bs4 / requests 导入开销大，只在真正抓取的方法内按需导入，
+# 使仅调用 extract_short_url 等轻量方法时无需加载它们
+
 log = logging.getLogger(__name__)
 
+# 一次扫描完成脚本内容的反转义：(多个反斜杠)" -> "、"{ -> {、}" -> }、$undefined -> null
+_UNESCAPE_RE = re.compile(r'\}\\*"|\\*"\{|\\+"|\$undefined')
+_UNESCAPE_MAP = {'}': '}', '$': 'null'}
+
+
+def _unescape_repl(m: re.Match) -> str:
+    token = m.group()
+    return _UNESCAPE_MAP.get(token[0]) or ('{' if token[-1] == '{' else '"')
+
+
+# 档位名中的分辨率标识，'4' 代表 4K
+_GEAR_RESOLUTION_RE = re.compile(r'(540|720|1080|1440|2160|(?<=_)4(?=_))')
+# 常见档位名直接查表，未收录的档位走正则（不写回表中，避免随档位名无限增长）
+_GEAR_TO_RESOLUTION: Dict[str, int] = {
+    "normal_540_0": 540, "normal_720_0": 720, "normal_1080_0": 1080,
+    "normal_1440_0": 1440, "normal_2160_0": 2160, "normal_4_0": 2160,
+    "low_540_0": 540, "low_720_0": 720, "lower_540_0": 540,
+    "adapt_540_1": 540, "adapt_lower_720_1": 720, "adapt_lowest_720_1": 720,
+    "adapt_lowest_1080_1": 1080, "adapt_lowest_4_1": 2160,
+    "540_1_1": 540, "720_1_1": 720, "1080_1_1": 1080, "1080_2_1": 1080,
+    "adaptive_lowest": 0,
+}
+
+
+def _gear_resolution(gear_name: str) -> int:
+    """由档位名推断分辨率，无法识别时返回 0。"""
+    resolution = _GEAR_TO_RESOLUTION.get(gear_name)
+    if resolution is None:
+        res_match = _GEAR_RESOLUTION_RE.search(gear_name)
+        resolution = int(res_match.group(1)) if res_match else 0
+        # 抖音的 '4' 分辨率标识通常代表4K
+        # Douyin's '4' resolution identifier usually represents 4K
+        if resolution == 4:
+            resolution = 2160
+    return resolution
+
+
+# 文件名非法字符
+_ILLEGAL_FILENAME_RE = re.compile(r'[\\/:*?"<>|]')
+
 
 class DouyinParser:
     """
@@ -85,9 +126,7 @@ class DouyinParser:
                             tail = tail[-1]
                             final_text = script.text.replace(head, '')
                             final_text = final_text.replace(tail, '')
-                            final_text = re.sub(r'\\{1,}"', '"', final_text)
-                            final_text = re.sub(r'"{', '{', final_text)
-                            final_text = re.sub(r'}"', '}', final_text)
+                            final_text = _UNESCAPE_RE.sub(_unescape_repl, final_text)
                             """
                             只匹配完整的"["string"]" 或者 "[123]"格式的内容，"[玫瑰]"这种属于表情字符串，不匹配；然后替换加上不带双引号的[],从而达到去除引号的目的
                             不应匹配："[玫瑰]"
@@ -95,7 +134,6 @@ class DouyinParser:
                             "["normal_720_0","normal_720_0"]"
                             """
                             final_text = re.sub(r'"(\[(?:"[^"]+"(?:,"[^"]+")*|\d+)\])"', r'\1', final_text)
-                            final_text = final_text.replace('$undefined', 'null')
                             final_text = re.sub(r'("\w+")\s*:\s*"([^|"]+)\|"([^"]+)"\|"',r'\1:"\2|\3|"', final_text)
                             try:
                                 target_dict = self._try_parse_json(final_text)
@@ -106,7 +144,7 @@ class DouyinParser:
         log.error("未匹配到标签内的目标内容")
         return None
 
-    async def _get_cookies(self, page: Page, cookie_names: List[str]) -> Dict[str, str]:
+    async def _get_cookies(self, page: 'Page', cookie_names: List[str]) -> Dict[str, str]:
         """
         从 Playwright Page 对象中提取指定名称的 Cookie。
 
@@ -141,7 +179,7 @@ class DouyinParser:
             log.error(f"获取指定 Cookie 时发生错误: {e}", exc_info=True)
             return {}
 
-    async def _intercept_detail_api(self, page: Page, short_url: str, target_api) -> Optional[Dict[str, Any]]:
+    async def _intercept_detail_api(self, page: 'Page', short_url: str, target_api) -> Optional[Dict[str, Any]]:
         """
         核心拦截逻辑：访问页面并捕获包含视频详情的JSON响应。
         Core interception logic: visits the page and captures the JSON response containing video details.
@@ -214,7 +252,8 @@ class DouyinParser:
             response = await resp_info.value  # 返回 Response 对象
 
             try:
-                detail_json = await response.json()
+                # 直接取原始字节交给 JSON 解析，跳过 response.json() 内部的文本解码
+                detail_json = json_loads(await response.body())
                 return detail_json
             except Exception as e:
                 log.error(f"解析 JSON 失败: {e}")
@@ -278,25 +317,20 @@ class DouyinParser:
         # Filter out DASH format, which requires a specific player and is not suitable for direct download and merge
         options = []
         for item in bit_rate_list:
-            if item.get("format") == "dash" or not item.get("play_addr", {}).get("url_list"):
+            play_addr = item.get("play_addr") or {}
+            urls = play_addr.get("url_list")
+            if item.get("format") == "dash" or not urls:
                 continue
 
             gear_name = item.get("gear_name", "")
-            res_match = re.search(r'(540|720|1080|1440|2160|(?<=_)4(?=_))', gear_name)
-            resolution = int(res_match.group(1)) if res_match else 0
-
-            # 抖音的 '4' 分辨率标识通常代表4K
-            # Douyin's '4' resolution identifier usually represents 4K
-            if resolution == 4:
-                resolution = 2160
+            resolution = _gear_resolution(gear_name)
 
             # 优先选择官方播放接口URL
             # Prioritize the official play API URL
-            urls = item.get("play_addr", {}).get("url_list", [])
             chosen_url = next((u for u in urls if "aweme/v1/play" in u), urls[0])
 
-            raw_bytes = item.get("play_addr", {}).get("data_size")
-            size_mb = round(raw_bytes / (1024 * 1024), 2) if isinstance(raw_bytes, (int, float)) else None
+            raw_bytes = play_addr.get("data_size")
+            size_mb = round(raw_bytes / 1048576, 2) if isinstance(raw_bytes, (int, float)) else None
             options.append(
                 VideoOption(
                     aweme_id=aweme_id,
@@ -306,8 +340,8 @@ class DouyinParser:
                     size_mb=size_mb,
                     gear_name=gear_name,
                     quality=item.get("quality_type", ""),
-                    height=item.get("play_addr").get("height", 720),
-                    width=item.get("play_addr").get("width", 1280),
+                    height=play_addr.get("height", 720),
+                    width=play_addr.get("width", 1280),
                     duration=duration,
                     ocr_content=ocr_content,
                 )
@@ -361,10 +395,13 @@ class DouyinParser:
 
     @retry_on_timeout_async(*DOUYIN_PARSE_IMAGE_TIMEOUT)
     async def fetch_images(self, short_url):
-        context = await PlaywrightManager.new_context()
-        page = await context.new_page()
-        log.debug(f"short url:{short_url}")
-        try:
+        import requests
+        from bs4 import BeautifulSoup
+        from PublicMethods.playwrigth_manager import PlaywrightManager
+
+        async with PlaywrightManager.acquire_context(storage_key="douyin") as context:
+            page = await context.new_page()
+            log.debug(f"short url:{short_url}")
             await page.route("**/*{stylesheet,css,image,media,ping,front,websocket,preflight}",
                              lambda route: route.abort())
             await page.goto(short_url)
@@ -382,9 +419,6 @@ class DouyinParser:
             aweme_json = self._search_scripts_from_scripts(script_tags, note_detail, f'(awemeId|liveReason)')
             return self._parse_images_options(aweme_json)
 
-        finally:
-            await context.close()
-
     @retry_on_timeout_async(*DOUYIN_PARSE_VIDEO_TIMEOUT)
     async def fetch(self, short_url: str, target_api=AWEME_DETAIL_API_URL) -> tuple[str, list[VideoOption]] | None:
         """
@@ -394,26 +428,26 @@ class DouyinParser:
         Returns:
             A tuple containing: (video_title, list_of_video_options)
         """
-        context = await PlaywrightManager.new_context()
-        page = await context.new_page()
-        log.debug(f"short url:{short_url}")
-        try:
-            detail_json = await self._intercept_detail_api(page, short_url, target_api)
-            if not detail_json:
-                raise ParseError("未能获取到有效的API JSON响应 (Failed to get a valid API JSON response).")
+        from PublicMethods.playwrigth_manager import PlaywrightManager
 
-            title_raw = detail_json.get("aweme_detail", {}).get("preview_title", "")
-            # 清理文件名中的非法字符
-            # Sanitize illegal characters from the filename
-            video_title = re.sub(r'[\\/:*?"<>|]', '_', title_raw) or short_url
+        async with PlaywrightManager.acquire_context() as context:
+            page = await context.new_page()
+            log.debug(f"short url:{short_url}")
+            try:
+                detail_json = await self._intercept_detail_api(page, short_url, target_api)
+                if not detail_json:
+                    raise ParseError("未能获取到有效的API JSON响应 (Failed to get a valid API JSON response).")
 
-            video_options = self._parse_video_options(detail_json)
-            if not video_options:
-                raise ParseError(
-                    "从API响应中未能解析出任何可下载的视频链接 (No downloadable links could be parsed).")
+                title_raw = detail_json.get("aweme_detail", {}).get("preview_title", "")
+                # 清理文件名中的非法字符
+                # Sanitize illegal characters from the filename
+                video_title = _ILLEGAL_FILENAME_RE.sub('_', title_raw) or short_url
 
-            return video_title, video_options
-        except Exception as e:
-            log.error(e)
-        finally:
-            await context.close()
+                video_options = self._parse_video_options(detail_json)
+                if not video_options:
+                    raise ParseError(
+                        "从API响应中未能解析出任何可下载的视频链接 (No downloadable links could be parsed).")
+
+                return video_title, video_options
+            except Exception as e:
+                log.error(e)
@@ -0,0 +1,52 @@
+# MusicDownload/cache.py
+"""
+歌单曲目列表与单曲下载链接的磁盘缓存（shelve），带 TTL。
+重复解析同一歌单/单曲时直接命中本地，省去接口往返。
+缓存读写失败只记日志并视为未命中，不影响正常下载流程。
+"""
+import logging
+import shelve
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = Path(__file__).with_name("cache")
+CACHE_FILE = CACHE_DIR / "music"
+# 缓存数据格式变更时递增，旧版本条目自动失效
+CACHE_VERSION = 1
+
+PLAYLIST_TTL = 24 * 3600  # 歌单曲目很少变化
+SONG_URL_TTL = 30 * 60    # CDN 下载链接会过期
+
+_lock = threading.Lock()
+
+
+def _full_key(key: str) -> str:
+    return f"v{CACHE_VERSION}:{key}"
+
+
+def cache_get(key: str) -> Any | None:
+    """取未过期的缓存数据，未命中/已过期返回 None"""
+    try:
+        with _lock, shelve.open(str(CACHE_FILE)) as db:
+            entry = db.get(_full_key(key))
+    except Exception as e:
+        logger.debug(f"读取音乐缓存失败 {key}: {e}")
+        return None
+    if entry and entry["expires"] > time.time():
+        logger.debug(f"命中音乐缓存 -> {key}")
+        return entry["data"]
+    return None
+
+
+def cache_set(key: str, data: Any, ttl: int) -> None:
+    """写入缓存，ttl 单位秒"""
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        with _lock, shelve.open(str(CACHE_FILE)) as db:
+            db[_full_key(key)] = {"expires": time.time() + ttl, "data": data}
+    except Exception as e:
+        logger.debug(f"写入音乐缓存失败 {key}: {e}")
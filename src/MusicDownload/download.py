@@ -6,14 +6,15 @@
 import os
 import re
 import argparse
-
-import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from MusicDownload.fetch_music_list import fetch_song_urls_via_api
-from MusicDownload.download_music import get_download_link, download_file
+from MusicDownload.download_music import SESSION, get_download_link, download_file
 import  logging
 log = logging.getLogger(__name__)
 
+PLAYLIST_WORKERS = 8    # 歌单并发下载线程数
+
 def extract_id(input_str, *, item_type):
     """
     从任意文本中提取歌单或单曲 ID。
@@ -27,8 +28,10 @@ def extract_id(input_str, *, item_type):
     m_short = re.search(r'https?://163cn\.tv/[A-Za-z0-9]+', input_str)
     if m_short:
         short_url = m_short.group(0)
-        # 跟随跳转
-        resp = requests.get(short_url, allow_redirects=True, timeout=5)
+        # 跟随跳转，只需最终地址，HEAD 即可；服务端不支持 HEAD 时再退回 GET
+        resp = SESSION.head(short_url, allow_redirects=True, timeout=5)
+        if resp.status_code == 405:
+            resp = SESSION.get(short_url, allow_redirects=True, timeout=5)
         real_url = resp.url
         log.debug(f"[DEBUG] 短链跳转到: {real_url}")
         input_str = real_url
@@ -59,14 +62,20 @@ def download_playlist(playlist_input, limit=None, output_dir='downloads'):
         urls = urls[:limit]
         log.debug(f"此次下载数量： {len(urls)} songs")
     os.makedirs(output_dir, exist_ok=True)
-    for idx, page_url in enumerate(urls, 1):
-        try:
-            real_url, song_name = get_download_link(page_url)
-            log.debug(f"[{idx}/{len(urls)}] {song_name}")
-            saved = download_file(real_url, song_name, output_dir)
-            log.debug(f"\tSaved: {saved}")
-        except Exception as e:
-            log.debug(f"\tError: {e}")
+
+    def _download_one(page_url):
+        real_url, song_name = get_download_link(page_url)
+        return download_file(real_url, os.path.join(output_dir, f"{song_name}.mp3"))
+
+    # 每首歌的解析与下载互不依赖，并发执行；各自写入独立文件，无共享状态
+    with ThreadPoolExecutor(max_workers=PLAYLIST_WORKERS) as pool:
+        futures = {pool.submit(_download_one, u): u for u in urls}
+        for idx, future in enumerate(as_completed(futures), 1):
+            try:
+                saved = future.result()
+                log.debug(f"[{idx}/{len(urls)}] Saved: {saved}")
+            except Exception as e:
+                log.debug(f"[{idx}/{len(urls)}] {futures[future]} Error: {e}")
     log.debug("Playlist download complete.")
 
 
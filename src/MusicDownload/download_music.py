@@ -6,14 +6,24 @@
 如需下载 MP3，可取消 download_file 调用的注释。
 """
 
+import asyncio
 import os
 import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+import httpx
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from MusicDownload.cache import cache_get, cache_set, SONG_URL_TTL
 
 # ———— 配置区 ————
 INPUT_FILE      = "song_urls.txt"    # 输入：每行一个 https://music.163.com/song?id=xxx
 OUTPUT_FILE     = "music_url.txt"    # 输出：写入所有真实下载链接
 OUT_DIR         = "downloads"        # 可选：下载目录
+MAX_WORKERS     = 8                  # 并发解析/下载线程数
 
 MUSIC_API_URL   = "https://api.toubiec.cn/api/music_v1.php"
 
@@ -42,26 +52,63 @@ MK_HEADERS = {
 }
 # ——————————————
 
-def get_download_link(song_page_url, return_song_id= False):
+def _build_session(headers=None):
     """
-    调用 music_v1.php，返回单曲的真实下载 URL。
-    使用静态 HEADER_TOKEN 和 BODY_TOKEN。
+    创建带连接池与网关错误重试的 Session，歌单批量处理时保持 keep-alive，避免每首歌重新握手
     """
-    m = re.search(r"id=(\d+)", song_page_url)
+    session = requests.Session()
+    if headers:
+        session.headers.update(headers)
+    adapter = HTTPAdapter(
+        pool_connections=16,
+        pool_maxsize=32,
+        max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504]),
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+# 解析接口专用（携带 MK_HEADERS 鉴权头）
+API_SESSION = _build_session(MK_HEADERS)
+# 短链跳转与 CDN 下载，不携带接口鉴权头
+SESSION = _build_session()
+
+
+_SONG_ID_RE = re.compile(r"id=(\d+)")
+
+
+def _song_id_of(song_page_url):
+    m = _SONG_ID_RE.search(song_page_url)
     if not m:
         raise RuntimeError("无法从 URL 提取 song ID")
-    song_id = m.group(1)
+    return m.group(1)
+
+
+MUSIC_LEVEL = "exhigh"
 
-    payload = {
+
+def _link_cache_key(song_id):
+    return f"song:{song_id}:{MUSIC_LEVEL}"
+
+
+def _link_result(download_url, song_name, song_id, return_song_id):
+    if return_song_id:
+        return download_url, song_name, song_id
+    return download_url, song_name
+
+
+def _link_payload(song_page_url):
+    return {
         "url":   song_page_url,
-        "level": "exhigh",
+        "level": MUSIC_LEVEL,
         "type":  "song",
         "token": BODY_TOKEN
     }
 
-    resp = requests.post(MUSIC_API_URL, json=payload, headers=MK_HEADERS, timeout=10)
-    resp.raise_for_status()
-    js = resp.json()
+
+def _parse_link_response(js, song_id):
+    """校验接口响应，返回 (download_url, song_name)"""
     if js.get("status") != 200:
         raise RuntimeError(f"解析失败，响应：{js}")
 
@@ -70,10 +117,64 @@ def get_download_link(song_page_url, return_song_id= False):
         raise RuntimeError(f"未获取到下载链接：{js}")
     # 从接口里拿 song_info.name
     song_name = js.get("song_info", {}).get("name", song_id)
-    if return_song_id:
-        return download_url, song_name, song_id
     return download_url, song_name
 
+
+def get_download_link(song_page_url, return_song_id= False, refresh=False):
+    """
+    调用 music_v1.php，返回单曲的真实下载 URL。
+    使用静态 HEADER_TOKEN 和 BODY_TOKEN。
+    refresh=True 时跳过缓存，强制重新解析。
+    """
+    song_id = _song_id_of(song_page_url)
+    if not refresh and (cached := cache_get(_link_cache_key(song_id))):
+        return _link_result(*cached, song_id, return_song_id)
+    resp = API_SESSION.post(MUSIC_API_URL, json=_link_payload(song_page_url), timeout=10)
+    resp.raise_for_status()
+    link = _parse_link_response(resp.json(), song_id)
+    cache_set(_link_cache_key(song_id), link, SONG_URL_TTL)
+    return _link_result(*link, song_id, return_song_id)
+
+
+# 异步客户端在首次使用时创建，绑定到调用方（机器人）的事件循环
+_ASYNC_CLIENT: httpx.AsyncClient | None = None
+
+
+def _get_async_client() -> httpx.AsyncClient:
+    global _ASYNC_CLIENT
+    if _ASYNC_CLIENT is None or _ASYNC_CLIENT.is_closed:
+        _ASYNC_CLIENT = httpx.AsyncClient(
+            headers=MK_HEADERS,
+            timeout=10,
+            limits=httpx.Limits(max_connections=64, max_keepalive_connections=16, keepalive_expiry=75),
+        )
+    return _ASYNC_CLIENT
+
+
+async def aclose_async_client():
+    """关闭异步客户端，须在创建它的事件循环上调用（机器人的 post_shutdown）"""
+    global _ASYNC_CLIENT
+    if _ASYNC_CLIENT is not None:
+        await _ASYNC_CLIENT.aclose()
+        _ASYNC_CLIENT = None
+
+
+async def aget_download_link(song_page_url, return_song_id=False, refresh=False):
+    """
+    get_download_link 的异步版本，供事件循环内调用，不阻塞其他协程。
+    缓存基于 shelve（加锁读写磁盘），放到线程里执行。
+    """
+    song_id = _song_id_of(song_page_url)
+    cache_key = _link_cache_key(song_id)
+    if not refresh and (cached := await asyncio.to_thread(cache_get, cache_key)):
+        return _link_result(*cached, song_id, return_song_id)
+    resp = await _get_async_client().post(MUSIC_API_URL, json=_link_payload(song_page_url))
+    resp.raise_for_status()
+    link = _parse_link_response(resp.json(), song_id)
+    await asyncio.to_thread(cache_set, cache_key, link, SONG_URL_TTL)
+    return _link_result(*link, song_id, return_song_id)
+
+
 def download_file(download_url, out_path):
     """
     流式下载并保存到本地，返回文件路径
@@ -81,7 +182,7 @@ def download_file(download_url, out_path):
     # fn = download_url.split("/")[-1].split("?")[0]
     # path = os.path.join(save_dir, fn)
     # 确保文件名带上 .mp3 后缀
-    with requests.get(download_url, stream=True, timeout=30) as r:
+    with SESSION.get(download_url, stream=True, timeout=30) as r:
         r.raise_for_status()
         with open(out_path, "wb") as f:
             for chunk in r.iter_content(8192):
@@ -93,26 +194,39 @@ def main():
     if not os.path.isfile(INPUT_FILE):
         print(f"错误：未找到输入文件 {INPUT_FILE}")
         return
-    with open(INPUT_FILE, "r", encoding="utf-8") as f:
-        urls = [l.strip() for l in f if l.strip()]
+    lines = Path(INPUT_FILE).read_text(encoding="utf-8").splitlines()
+    urls = [l.strip() for l in lines if l.strip()]
 
     if not urls:
         print(f"错误：{INPUT_FILE} 中无有效 URL")
         return
 
-    with open(OUTPUT_FILE, "w", encoding="utf-8") as wf:
-        for url in urls:
+    os.makedirs(OUT_DIR, exist_ok=True)
+    # 解析与下载均为网络 I/O，并发执行；链接只在主线程收集，结束后一次性写入
+    real_urls = []
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        link_futures = {pool.submit(get_download_link, url): url for url in urls}
+        download_futures = {}
+        for future in as_completed(link_futures):
+            url = link_futures[future]
+            try:
+                real_url, song_name = future.result()
+            except Exception as e:
+                print(f"  错误：{url} {e}")
+                continue
+            print(f"获取真实链接：{url} -> {real_url}")
+            real_urls.append(real_url)
+            # 如无需自动下载，注释掉下一行：
+            out_path = os.path.join(OUT_DIR, f"{song_name}.mp3")
+            download_futures[pool.submit(download_file, real_url, out_path)] = url
+
+        for future in as_completed(download_futures):
             try:
-                print(f"正在处理：{url}")
-                real_url, song_name = get_download_link(url)
-                print(f"  获取真实链接：{real_url}")
-                wf.write(real_url + "\n")
-                # 如需自动下载，取消下一行注释：
-                saved = download_file(real_url, song_name, OUT_DIR)
-                print(f"  已下载至：{saved}")
+                print(f"  已下载至：{future.result()}")
             except Exception as e:
-                print(f"  错误：{e}")
+                print(f"  错误：{download_futures[future]} {e}")
 
+    Path(OUTPUT_FILE).write_text("".join(u + "\n" for u in real_urls), encoding="utf-8")
     print(f"\n完成，所有链接已写入 {OUTPUT_FILE}")
 
 if __name__ == "__main__":
@@ -9,8 +9,20 @@
 import sys
 import requests
 
-def fetch_song_urls_via_api(playlist_id):
+from MusicDownload.cache import cache_get, cache_set, PLAYLIST_TTL
+from PublicMethods.tools import json_loads
+
+def fetch_song_urls_via_api(playlist_id, refresh=False):
+    """
+    refresh=True 时跳过缓存，强制重新请求接口
+    """
     base_url = 'https://music.163.com'
+    cache_key = f"playlist:{playlist_id}"
+    if not refresh:
+        cached = cache_get(cache_key)
+        if cached is not None:
+            return cached
+
     # v6 版本接口，返回 playlist.trackIds（全量）以及 playlist.tracks（前10条）
     api_url = f'{base_url}/api/v6/playlist/detail'
     params = {'id': playlist_id, 'n': 1000, 'csrf_token': ''}
@@ -25,7 +37,8 @@ def fetch_song_urls_via_api(playlist_id):
 
     resp = requests.get(api_url, params=params, headers=headers, timeout=10)
     resp.raise_for_status()
-    data = resp.json()
+    # 直接解析原始字节（orjson 可用时更快），省去先解码成 str 的步骤
+    data = json_loads(resp.content)
 
     # —— 新增：处理私密歌单错误 ——
     if data.get("code") == 401:
@@ -48,7 +61,9 @@ def fetch_song_urls_via_api(playlist_id):
         )
 
     # 拼接完整 URL
-    return [f"{base_url}/song?id={sid}" for sid in id_list]
+    urls = [f"{base_url}/song?id={sid}" for sid in id_list]
+    cache_set(cache_key, urls, PLAYLIST_TTL)
+    return urls
 
 
 def main():
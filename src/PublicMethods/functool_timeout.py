@@ -1,6 +1,5 @@
 import functools
 import concurrent.futures
-import threading
 import logging
 log = logging.getLogger(__name__)
 
@@ -8,6 +7,10 @@ class TimeoutException(Exception):
     """函数执行超时"""
 
 
+# 所有 timeout 装饰的调用共用一个线程池，避免每次调用都创建/销毁线程
+_TIMEOUT_POOL = concurrent.futures.ThreadPoolExecutor(max_workers=32, thread_name_prefix="timeout")
+
+
 def timeout(seconds: float):
     """
     装饰器：在独立线程中运行函数，等待 seconds 秒。
@@ -17,17 +20,15 @@ def timeout(seconds: float):
     def decorator(func):
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            # 用单线程池跑一次调用
-            with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
-                future = executor.submit(func, *args, **kwargs)
-                try:
-                    return future.result(timeout=seconds)
-                except concurrent.futures.TimeoutError:
-                    # （可选）记录一下哪个线程还没结束
-                    th = threading.current_thread().name
-                    raise TimeoutException(
-                        f"调用 `{func.__name__}` 超时（>{seconds}s）"
-                    )
+            future = _TIMEOUT_POOL.submit(func, *args, **kwargs)
+            try:
+                return future.result(timeout=seconds)
+            except concurrent.futures.TimeoutError:
+                # 尽力取消；已在运行的调用无法中断，但不再阻塞等待其结束
+                future.cancel()
+                raise TimeoutException(
+                    f"调用 `{func.__name__}` 超时（>{seconds}s）"
+                )
 
         return wrapper
 
@@ -1,7 +1,6 @@
 import os
 import json
 import time
-from itertools import cycle
 from datetime import datetime
 
 from google import genai
@@ -10,6 +9,8 @@ import logging
 
 log = logging.getLogger(__name__)
 
+KEY_RETRY_AFTER_S = 300  # 连通性测试失败的 key 在此时间内不再重复探测，过期后重新测试
+
 
 class GeminiClient:
     """
@@ -21,7 +22,12 @@ class GeminiClient:
     def __init__(self, api_key: str = None):
         self.model = None
         self.api_keys = []
-        self.key_iterator = None
+        self._key_idx = 0  # 下一次轮换选取的 key 下标
+        # 按 key 缓存 SDK 客户端与连通性结果，reset() 轮换密钥时不再重复构造和探测；
+        # 只长期记住成功的 key，失败的 key 记下时间，KEY_RETRY_AFTER_S 后重新探测（网络抖动/限额可恢复）
+        self._clients: dict[str, genai.client.Client] = {}
+        self._valid_keys: set[str] = set()
+        self._failed_keys: dict[str, float] = {}
         if not api_key:
             self._init_api_key()
             if not self.api_keys:
@@ -42,8 +48,6 @@ class GeminiClient:
             # 假设环境变量是JSON字符串数组，例如 '["key1", "key2"]'
             self.api_keys = json.loads(api_keys_str)
             log.debug("gemini keys 为json字符串")
-            if isinstance(self.api_keys, list) and self.api_keys:
-                self.key_iterator = cycle(self.api_keys)
         except (json.JSONDecodeError, TypeError):
             # 对逗号分隔的密钥进行回退
             if isinstance(api_keys_str, str):
@@ -51,15 +55,15 @@ class GeminiClient:
                 log.debug("gemini keys 为list列表")
                 self.api_keys[0] = self.api_keys[0].strip('[')
                 self.api_keys[-1] = self.api_keys[-1].strip(']')
-                if self.api_keys:
-                    self.key_iterator = cycle(self.api_keys)
 
     def _get_next_api_key(self):
-        if not self.key_iterator:
+        if not isinstance(self.api_keys, list) or not self.api_keys:
             return None
-        key = next(self.key_iterator)
-        log.debug(f"选取 gemini keys-{self.api_keys.index(key)} {key[:15]}*****")
-        return next(self.key_iterator)
+        i = self._key_idx
+        self._key_idx = (i + 1) % len(self.api_keys)
+        key = self.api_keys[i]
+        log.debug(f"选取 gemini keys-{i} {key[:15]}*****")
+        return key
 
     def reset(self):
         """重置内容列表，准备新一轮请求"""
@@ -124,6 +128,8 @@ class GeminiClient:
         """
         if not self.model:
             raise ValueError("请先调用 set_model() 指定模型名称")
+        if self.client is None:
+            raise RuntimeError("当前没有可用的 Gemini API Key（连通性测试未通过）")
         return self.client.models.generate_content(
             model=self.model,
             contents=self.contents,
@@ -136,18 +142,42 @@ class GeminiClient:
         """
         if not self.api_key:
             return None
+        key = self.api_key
+        if key in self._valid_keys:
+            return self._clients[key]
+        failed_at = self._failed_keys.get(key)
+        if failed_at is not None and time.monotonic() - failed_at < KEY_RETRY_AFTER_S:
+            return None
         try:
-            client = genai.client.Client(api_key=self.api_key)
-            # 一个简单、低成本的操作来测试连接性
-            list(client.models.list())
+            client = self._clients.get(key)
+            if client is None:
+                client = self._clients[key] = genai.client.Client(api_key=key)
+            # 一个简单、低成本的操作来测试连接性，只取第一项，不展开整个模型列表
+            next(iter(client.models.list()), None)
+            self._valid_keys.add(key)
+            self._failed_keys.pop(key, None)
             return client
         except Exception as e:
+            log.warning(f"gemini key {key[:15]}***** 连通性测试失败: {e}")
+            self._failed_keys[key] = time.monotonic()
             return None
 
 
-gemini = GeminiClient()
+_gemini: GeminiClient | None = None
+
+
+def __getattr__(name):
+    """PEP 562：首次访问 gemini 时才创建单例，避免 import 时就发起连通性测试请求"""
+    global _gemini
+    if name == "gemini":
+        if _gemini is None:
+            _gemini = GeminiClient()
+        return _gemini
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 if __name__ == '__main__':
+    gemini = GeminiClient()
     i = 0
     while i < 3:
         gemini.reset()
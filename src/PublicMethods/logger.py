@@ -1,7 +1,6 @@
 import logging
 import os
 from datetime import datetime
-import colorlog
 
 # 定义日志文件存放目录
 LOG_DIR = 'Logs'
@@ -48,6 +47,9 @@ def setup_log(log_level=logging.INFO, log_name: str = None, one_file=False):
 
     # !!! 关键改动：只在根Logger没有Handlers时才添加，避免重复配置 !!!
     if not root_logger.handlers:
+        # colorlog 只在真正配置日志时才需要，避免 import 本模块就加载
+        import colorlog
+
         # 1. 配置控制台输出 (带颜色)
         log_colors_config = {
             'DEBUG': 'cyan',  # 确保DEBUG级别也有颜色
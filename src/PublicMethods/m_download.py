@@ -1,16 +1,73 @@
 import os
+import random
+import socket
 import sys
 import threading
 import time
+from array import array
 from typing import Optional, Dict, List
+from queue import Queue, Empty
+from urllib.parse import urljoin
 import requests
-from queue import Queue
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+from urllib3.exceptions import HTTPError as Urllib3HTTPError
 import logging
 
 from PublicMethods.tools import prepared_to_curl
 
 logger = logging.getLogger(__name__)
 
+_O_BINARY = getattr(os, 'O_BINARY', 0)  # Windows 下以二进制模式打开
+CHUNK_SIZE = 1 << 20  # 每次从响应流最多读 1MiB，块越大 Python 循环与写系统调用越少
+RANGE_CHUNK_SIZE = 4 << 20  # 多线程下载时每次领取的区间大小 4MiB
+RETRY_MAX_DELAY = 30  # 分片重试退避的最长等待（秒），Retry-After 也不超过该值
+_SIZE_UNITS = ('', 'K', 'M', 'G', 'T', 'P', 'E', 'Z', 'Y')
+# 下载连接的 SO_RCVBUF（字节），默认 0 表示不设置。Linux 上显式设置 SO_RCVBUF 会关闭接收缓冲自动调优，
+# 且取值会被 net.core.rmem_max（默认约 208KiB）静默截断，通常反而更慢；只有调大了 rmem_max 的高带宽时延积
+# 链路才值得通过环境变量 DOWNLOAD_SOCKET_RCVBUF 开启
+SOCKET_RCVBUF_SIZE = int(os.getenv("DOWNLOAD_SOCKET_RCVBUF", "0") or 0)
+
+if hasattr(os, 'pwrite'):
+    _pwrite = os.pwrite
+else:
+    def _pwrite(fd: int, data: bytes, offset: int) -> int:
+        """不支持 pwrite 的平台（Windows）：fd 为线程独占，seek 后写入等价于 pwrite。"""
+        os.lseek(fd, offset, os.SEEK_SET)
+        return os.write(fd, data)
+
+
+def _pwrite_all(fd: int, data: memoryview, offset: int):
+    """pwrite 可能只写出部分字节，按返回值推进偏移，循环直到全部写完。"""
+    while data:
+        n = _pwrite(fd, data, offset)
+        data = data[n:]
+        offset += n
+
+
+def _write_all(f, data: memoryview):
+    """无缓冲文件的 write 可能只写出部分字节，循环直到全部写完。"""
+    while data:
+        n = f.write(data)
+        data = data[n:]
+
+
+class _TunedSocketAdapter(HTTPAdapter):
+    """
+    下载专用连接适配器：沿用 urllib3 默认选项（已含 TCP_NODELAY），配置了 SOCKET_RCVBUF_SIZE 时再放大 SO_RCVBUF。
+    """
+    _socket_options = HTTPConnection.default_socket_options + (
+        [(socket.SOL_SOCKET, socket.SO_RCVBUF, SOCKET_RCVBUF_SIZE)] if SOCKET_RCVBUF_SIZE > 0 else []
+    )
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs.setdefault("socket_options", self._socket_options)
+        super().init_poolmanager(*args, **kwargs)
+
+    def proxy_manager_for(self, proxy, **proxy_kwargs):
+        proxy_kwargs.setdefault("socket_options", self._socket_options)
+        return super().proxy_manager_for(proxy, **proxy_kwargs)
+
 
 class DownloadError(Exception):
     """自定义下载错误类，用于表示下载过程中发生的特定错误。"""
@@ -22,39 +79,42 @@ class ProgressMonitor(threading.Thread):
     下载进度监控线程，负责实时更新下载进度到控制台。
     """
 
-    def __init__(self, total_bytes: int, downloaded_counter: List[int], lock: threading.Lock, interval: float = 0.05):
+    def __init__(self, total_bytes: int, downloaded_counter: 'array[int]', interval: float = 0.25):
         """
         初始化进度监控器。
 
         参数:
             total_bytes (int): 文件总字节数。
-            downloaded_counter (List[int]): 共享的已下载字节计数器（单元素列表，以便在线程间共享引用）。
-            lock (threading.Lock): 用于保护 downloaded_counter 的线程锁。
-            interval (float): 刷新进度显示的时间间隔（秒）。
+            downloaded_counter (array[int]): 按线程分槽的已下载字节计数器，每个槽只有一个写入者，读取时求和，无需加锁。
+            interval (float): 刷新进度显示的时间间隔（秒），默认 4Hz。
         """
         super().__init__(daemon=True)  # 设置为守护线程，主程序退出时自动终止
         self.total = total_bytes
         self.downloaded = downloaded_counter
-        self.lock = lock
         self.interval = interval
-        self.start_time = time.time()
+        self.start_time = time.monotonic()
         self._stop_event = threading.Event()  # 用于线程优雅退出的事件
-        logger.debug(f"进度监控器初始化完成。总大小: {Downloader._sizeof_fmt_static(self.total)}")
+        self.total_str = Downloader._sizeof_fmt_static(self.total)  # 总大小不变，只格式化一次
+        logger.debug(f"进度监控器初始化完成。总大小: {self.total_str}")
 
     def run(self):
         """
         线程执行体，循环更新下载进度。
         """
-        while not self._stop_event.is_set():
-            with self.lock:
-                current_downloaded = self.downloaded[0]
+        # 非终端输出（日志重定向、服务运行）时不展示实时进度，跳过每次刷新的格式化开销
+        is_tty = sys.stdout.isatty()
+        # 停止事件触发时 wait 立即返回 True，无需等满一个周期
+        while not self._stop_event.wait(self.interval):
+            if not is_tty:
+                continue
+            current_downloaded = sum(self.downloaded)
 
             # 避免除以零
-            elapsed_time = max(time.time() - self.start_time, 0.001)
+            elapsed_time = max(time.monotonic() - self.start_time, 0.001)
             current_speed = current_downloaded / elapsed_time
 
             dl_str = Downloader._sizeof_fmt_static(current_downloaded)
-            total_str = Downloader._sizeof_fmt_static(self.total)
+            total_str = self.total_str
             speed_str = Downloader._sizeof_fmt_static(current_speed) + '/s'
 
             # 计算百分比
@@ -63,16 +123,14 @@ class ProgressMonitor(threading.Thread):
             # 使用更丰富的进度显示格式
             # sys.stdout.write(f"\r下载进度: {dl_str}/{total_str} ({progress_percent:.2f}%)，平均速度: {speed_str}")
             # sys.stdout.flush()
-            time.sleep(self.interval)
 
         # 线程停止后，最后一次刷新到 100% 并显示最终速度
-        with self.lock:
-            final_downloaded = self.downloaded[0]
-        final_elapsed = max(time.time() - self.start_time, 0.001)
+        final_downloaded = sum(self.downloaded)
+        final_elapsed = max(time.monotonic() - self.start_time, 0.001)
         final_speed = final_downloaded / final_elapsed
 
         dl_str = Downloader._sizeof_fmt_static(final_downloaded)
-        total_str = Downloader._sizeof_fmt_static(self.total)
+        total_str = self.total_str
         speed_str = Downloader._sizeof_fmt_static(final_speed) + '/s'
 
         # 确保总大小为0时显示正确
@@ -93,116 +151,150 @@ class ProgressMonitor(threading.Thread):
 
 class SegmentDownloader(threading.Thread):
     """
-    分片下载线程类，用于并发下载文件的指定字节区间。
+    分片下载工作线程：从共享队列中不断领取字节区间并下载，直到队列取空。
+    区间切得较小，快的线程会多领几块，慢的 CDN 节点只拖慢它手上的那一块。
     """
 
     def __init__(self,
                  session: requests.Session,
                  url: str,
-                 start_byte: int,
-                 end_byte: int,
-                 tmp_path: str,
-                 queue: Queue,
+                 path: str,
+                 ranges: Queue,
+                 results: List[Optional[str]],
+                 index: int,
                  headers: Dict[str, str],
-                 downloaded_counter: List[int],
-                 lock: threading.Lock,
-                 max_retries: int = 3,
-                 close_session_on_finish: bool = False):
+                 downloaded_counter: 'array[int]',
+                 abort: threading.Event,
+                 max_retries: int = 3):
         """
         初始化分片下载器。
 
         参数:
-            session (requests.Session): requests.Session 对象，用于发起 HTTP 请求。
+            session (requests.Session): 所有分片共享的 requests.Session（由 Downloader 统一管理生命周期）。
             url (str): 要下载的资源 URL（最终已处理重定向）。
-            start_byte (int): 本分片起始字节位置（包含）。
-            end_byte (int): 本分片结束字节位置（包含）。
-            tmp_path (str): 本分片临时文件保存路径（.partN）。
-            queue (Queue): Queue 对象，用于将下载结果（start_byte, tmp_path/None）回传给主线程。
+            path (str): 预分配好大小的输出文件路径（.part），各区间按偏移直接写入。
+            ranges (Queue): 待下载的 (start_byte, end_byte) 区间队列，所有工作线程共享。
+            results (List[Optional[str]]): 主线程预分配的结果列表，本线程结束时写入 results[index]（成功为 path，失败为 None）。
+            index (int): 本线程在 results 中的下标。
             headers (Dict[str, str]): HTTP 请求头，会在此基础上添加 Range 字段。
-            downloaded_counter (List[int]): 共享的已下载字节计数器（列表或其包装），用于进度统计。
-            lock (threading.Lock): 线程锁，用于保护 downloaded_counter 的并发写入。
-            max_retries (int): 每个分片最大重试次数。
-            close_session_on_finish (bool): 是否在线程结束时关闭其使用的 session。
-                                            仅当 session 是此线程独有且不会被复用时设置为 True。
+            downloaded_counter (array[int]): 按线程分槽的已下载字节计数器，本线程只累加 downloaded_counter[index]。
+            abort (threading.Event): 任一线程失败或主线程超时后置位，其余线程领完手上的区间即退出。
+            max_retries (int): 每个区间最大重试次数。
         """
         super().__init__()
         self.session = session
         self.url = url
-        self.start_byte = start_byte
-        self.end_byte = end_byte
-        self.tmp_path = tmp_path
-        self.queue = queue
-        self.headers = headers.copy()  # 拷贝 headers 以便安全修改
-        self.headers['Range'] = f"bytes={start_byte}-{end_byte}"
+        self.path = path
+        self.ranges = ranges
+        self.results = results
+        self.index = index
+        self.headers = headers
         self.max_retries = max_retries
         self.downloaded_ctr = downloaded_counter
-        self.lock = lock
-        self.close_session_on_finish = close_session_on_finish
-        self.name = f"SegmentDownloader-{start_byte}-{end_byte}"  # 为线程命名，便于日志追踪
-        logger.debug(f"分片下载线程 {self.name} 初始化完成。范围: {start_byte}-{end_byte}, 目标: {tmp_path}")
+        self.abort = abort
+        self.name = f"SegmentDownloader-{index}"  # 为线程命名，便于日志追踪
+        logger.debug(f"分片下载线程 {self.name} 初始化完成。目标: {path}")
 
     def run(self):
         """
-        线程执行体，负责下载指定字节范围的数据。
+        线程执行体，循环领取区间并下载。
         """
-        logger.debug(f"分片下载线程 {self.name} 开始下载。URL: {self.url}, Range: {self.headers['Range']}")
+        try:
+            # 每个线程持有独立 fd，整个生命周期内复用，区间直接写入对应偏移
+            fd = os.open(self.path, os.O_WRONLY | _O_BINARY)
+        except OSError as e:
+            logger.error(f"分片下载线程 {self.name} 打开输出文件失败: {self.path}, 错误: {e}")
+            self.abort.set()
+            return
+        try:
+            # 从底层响应流 readinto 到复用的 1MiB 缓冲区。注意 urllib3 2.x 的 readinto 内部仍是 read() 后拷贝，
+            # 每块依旧分配一次；这里只省掉 iter_content 生成器的逐块开销
+            mv = memoryview(bytearray(CHUNK_SIZE))
+            while not self.abort.is_set():
+                try:
+                    start_byte, end_byte = self.ranges.get_nowait()
+                except Empty:
+                    break
+                if not self._download_range(fd, mv, start_byte, end_byte):
+                    # 通知其他线程尽快停止，主线程据 results 中的 None 回退到单线程下载
+                    self.abort.set()
+                    return
+            else:
+                return  # 被其他线程/主线程中止，results 保持 None
+            logger.debug(f"分片下载线程 {self.name} 完成")
+            self.results[self.index] = self.path  # 成功，写入结果列表
+        finally:
+            os.close(fd)
+
+    def _download_range(self, fd: int, mv: memoryview, start_byte: int, end_byte: int) -> bool:
+        """
+        下载 [start_byte, end_byte] 区间并写入 fd 对应偏移，带重试。成功返回 True。
+        """
+        headers = {**self.headers, 'Range': f"bytes={start_byte}-{end_byte}"}
+        expected_size = end_byte - start_byte + 1
         for attempt in range(1, self.max_retries + 1):
+            retry_after = None
             try:
-                # 确保每次重试前检查文件是否存在，如果存在则尝试删除，避免追加
-                if os.path.exists(self.tmp_path):
-                    logger.warning(f"检测到分片临时文件 {self.tmp_path} 存在，尝试删除后重试。")
-                    os.remove(self.tmp_path)
-
                 # 设置更合理的超时，连接和读取分开
-                with self.session.get(self.url, headers=self.headers, stream=True, timeout=(10, 30)) as r:
+                with self.session.get(self.url, headers=headers, stream=True, timeout=(10, 30)) as r:
                     r.raise_for_status()  # 检查 HTTP 状态码，非 2xx 抛出异常
 
-                    # 检查 Content-Range 头，确保服务器响应了正确的范围
+                    # 服务器忽略 Range 时会返回 200 和完整文件，按偏移写入会覆盖相邻区间；重试也不会变，直接放弃
+                    if r.status_code != 206:
+                        logger.error(
+                            f"分片 {self.name} 区间 {headers['Range']} 未返回 206 (状态码 {r.status_code})，服务器不支持 Range。"
+                        )
+                        return False
+
+                    # 检查 Content-Range 头，确保服务器响应了正确的范围，否则写到错误偏移
                     content_range = r.headers.get('Content-Range')
                     if content_range:
                         # 示例: bytes 0-100/1000
                         try:
                             range_info = content_range.split(' ')[1].split('/')[0]
                             start, end = map(int, range_info.split('-'))
-                            if not (start == self.start_byte and end == self.end_byte):
-                                logger.warning(
-                                    f"服务器返回的 Content-Range 不匹配请求范围。请求: {self.headers['Range']}, 响应: {content_range}"
-                                )
-                        except ValueError:
+                        except (IndexError, ValueError):
+                            start = end = None
                             logger.warning(f"无法解析 Content-Range: {content_range}")
-
-                    actual_downloaded_in_segment = 0
-                    with open(self.tmp_path, 'wb') as f:
-                        for chunk in r.iter_content(8192):  # 每次获取 8KB 数据
-                            if not chunk:  # 跳过空块
-                                continue
-                            f.write(chunk)
-                            chunk_len = len(chunk)
-                            actual_downloaded_in_segment += chunk_len
-                            # 累加到共享计数器
-                            with self.lock:
-                                self.downloaded_ctr[0] += chunk_len
-
-                # 验证下载的分片大小是否与预期一致（如果 Content-Length 可用）
-                expected_size = self.end_byte - self.start_byte + 1
-                if actual_downloaded_in_segment != expected_size:
-                    logger.warning(
-                        f"分片 {self.name} 下载大小不匹配。预期: {expected_size}B, 实际: {actual_downloaded_in_segment}B。可能文件被截断或Range请求部分支持。"
-                    )
-
-                logger.debug(
-                    f"分片下载线程 {self.name} 完成")
-                self.queue.put((self.start_byte, self.tmp_path))  # 成功，将结果放入队列
-                return  # 成功，退出线程
-            except requests.exceptions.RequestException as e:
-                # 捕获 requests 库相关的异常，更具体的错误信息
+                        if start is not None and not (start == start_byte and end == end_byte):
+                            raise DownloadError(
+                                f"服务器返回的 Content-Range 不匹配请求范围。请求: {headers['Range']}, 响应: {content_range}"
+                            )
+
+                    # 重试时从 start_byte 重新覆盖写；最多读 expected_size 字节，绝不越过本区间
+                    actual_downloaded = 0
+                    offset = start_byte
+                    r.raw.decode_content = True
+                    while actual_downloaded < expected_size:
+                        n = r.raw.readinto(mv[:min(len(mv), expected_size - actual_downloaded)])
+                        if not n:
+                            break
+                        _pwrite_all(fd, mv[:n], offset)
+                        offset += n
+                        actual_downloaded += n
+                        # 只写本线程自己的槽位，单写者无竞争，不需要锁
+                        self.downloaded_ctr[self.index] += n
+
+                # 验证下载的区间大小是否与预期一致，不一致视为本次失败并重试，避免把截断的区间拼进成品
+                if actual_downloaded == expected_size:
+                    return True
                 logger.warning(
-                    f"分片下载线程 {self.name} 请求失败 (尝试 {attempt}/{self.max_retries})。URL: {self.url}, Range: {self.headers['Range']}, 错误: {e}"
+                    f"分片 {self.name} 区间 {headers['Range']} 下载大小不匹配 (尝试 {attempt}/{self.max_retries})。预期: {expected_size}B, 实际: {actual_downloaded}B。可能文件被截断或Range请求部分支持。"
+                )
+            except DownloadError as e:
+                logger.warning(f"分片下载线程 {self.name} 响应异常 (尝试 {attempt}/{self.max_retries}): {e}")
+            except (requests.exceptions.RequestException, Urllib3HTTPError) as e:
+                # 捕获 requests / urllib3（直接读取 r.raw 时）相关的异常，更具体的错误信息
+                response = getattr(e, 'response', None)
+                if response is not None:
+                    retry_after = response.headers.get('Retry-After')
+                logger.warning(
+                    f"分片下载线程 {self.name} 请求失败 (尝试 {attempt}/{self.max_retries})。URL: {self.url}, Range: {headers['Range']}, 错误: {e}"
                 )
             except IOError as e:
                 # 文件写入错误
                 logger.error(
-                    f"分片下载线程 {self.name} 文件写入失败 (尝试 {attempt}/{self.max_retries})。文件: {self.tmp_path}, 错误: {e}"
+                    f"分片下载线程 {self.name} 文件写入失败 (尝试 {attempt}/{self.max_retries})。文件: {self.path}, 错误: {e}"
                 )
             except Exception as e:
                 # 捕获其他未知异常
@@ -211,23 +303,25 @@ class SegmentDownloader(threading.Thread):
                     exc_info=True
                 )
 
-            time.sleep(1 * attempt)  # 每次重试间隔递增
+            if attempt < self.max_retries:
+                time.sleep(self._backoff_delay(attempt, retry_after))
 
-        # 所有重试失败，放入 None，通知主线程回退
-        logger.error(f"分片下载线程 {self.name} 达到最大重试次数 ({self.max_retries}) 仍未能完成。将回退到单线程下载。")
-        self.queue.put((self.start_byte, None))
+        # 所有重试失败，通知主线程回退
+        logger.error(f"分片下载线程 {self.name} 区间 {headers['Range']} 达到最大重试次数 ({self.max_retries}) 仍未能完成。将回退到单线程下载。")
+        return False
 
-    def __del__(self):
+    @staticmethod
+    def _backoff_delay(attempt: int, retry_after: Optional[str] = None) -> float:
         """
-        析构函数中尝试关闭 session，确保资源释放。
-        仅当 session 是独占时才关闭。
+        重试等待时间：服务器给了秒数形式的 Retry-After 就照办，否则指数退避加随机抖动，
+        避免所有分片同时 503 后又同时重试。两者都不超过 RETRY_MAX_DELAY。
         """
-        if self.close_session_on_finish and self.session:
+        if retry_after:
             try:
-                self.session.close()
-                logger.debug(f"分片下载线程 {self.name} 自动关闭了其 session。")
-            except Exception as e:
-                logger.warning(f"分片下载线程 {self.name} 关闭 session 失败: {e}")
+                return min(RETRY_MAX_DELAY, max(0.0, float(retry_after)))
+            except ValueError:
+                pass  # HTTP-date 形式的 Retry-After 不解析，退回指数退避
+        return min(RETRY_MAX_DELAY, 2 ** (attempt - 1) + random.random())
 
 
 class Downloader:
@@ -242,15 +336,37 @@ class Downloader:
         参数:
             threads (int): 多线程下载时使用的并发线程数。
             default_session (requests.Session, optional): 可选的默认 requests.Session 对象。
-                                                        如果提供，下载器会复用此 Session 进行探测和单线程下载。
-                                                        如果为 None，则会创建一个新的 Session。
+                                                        如果提供，下载器会复用此 Session 进行探测和下载。
+                                                        如果为 None，则会创建一个连接池与线程数匹配的新 Session。
         """
         if threads <= 0:
             raise ValueError("并发线程数必须大于0。")
         self.threads = threads
-        self.default_session = session or requests.Session()
+        # 只关闭自己创建的 Session，外部传入的由调用方负责
+        self._owns_session = session is None
+        if session is None:
+            session = requests.Session()
+            # 所有分片线程共享同一个 Session，连接池按线程数放大，避免默认 10 个连接成为隐形队列
+            adapter = _TunedSocketAdapter(pool_connections=threads, pool_maxsize=threads * 2, max_retries=0)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+        self.default_session = session
         logger.info(f"Downloader 初始化完成。默认并发线程数: {self.threads}")
 
+    def close(self):
+        """
+        显式释放下载器自己创建的 Session 及其连接池。
+        """
+        if self._owns_session:
+            self.default_session.close()
+            logger.debug("Downloader 已关闭自有 Session。")
+
+    def __enter__(self) -> 'Downloader':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
     @staticmethod
     def _sizeof_fmt_static(num: float, suffix: str = 'B') -> str:
         """
@@ -266,11 +382,9 @@ class Downloader:
         if num < 0:
             return f"-{Downloader._sizeof_fmt_static(abs(num), suffix)}"  # 处理负数
 
-        for unit in ['', 'K', 'M', 'G', 'T', 'P', 'E', 'Z', 'Y']:
-            if abs(num) < 1024.0:
-                return f"{num:.2f}{unit}{suffix}"
-            num /= 1024.0
-        return f"{num:.2f}Y{suffix}"  # 应该不会达到 YB 级别，但作为兜底
+        # 按二进制位数直接定位单位，每 10 位进一级；超过 Y 时按 Y 显示
+        i = min((int(num).bit_length() - 1) // 10, 8) if num >= 1024 else 0
+        return f"{num / (1 << (i * 10)):.2f}{_SIZE_UNITS[i]}{suffix}"
 
     def _get_final_url(
             self,
@@ -300,6 +414,7 @@ class Downloader:
         抛出:
             DownloadError: 如果达到最大重定向次数或请求失败。
         """
+        hdr = headers or {}
         current_url = url
         visited_urls = {url}  # 记录已访问的 URL，防止重定向循环
 
@@ -312,7 +427,7 @@ class Downloader:
                 if use_get:
                     resp = self.default_session.get(
                         current_url,
-                        headers=headers or {},
+                        headers=hdr,
                         timeout=timeout,
                         allow_redirects=False  # 禁止 requests 自动处理重定向
                     )
@@ -320,7 +435,7 @@ class Downloader:
                     # 使用 HEAD 请求，只获取头部信息，减少带宽消耗
                     resp = self.default_session.head(
                         current_url,
-                        headers=headers or {},
+                        headers=hdr,
                         timeout=timeout,
                         allow_redirects=False  # 禁止 requests 自动处理重定向
                     )
@@ -332,7 +447,6 @@ class Downloader:
                     location = resp.headers['Location']
                     # 处理相对路径重定向
                     if not location.startswith(('http://', 'https://')):
-                        from urllib.parse import urljoin
                         location = urljoin(current_url, location)
 
                     logger.debug(f"[Redirect {i + 1}/{max_redirects}] 从 {current_url} → {location}")
@@ -376,8 +490,6 @@ class Downloader:
             headers: Optional[Dict[str, str]] = None,
             timeout: int = 60,
             max_redirects: int = 5,
-            multi_session: bool = False,  # 默认开启多 Session 策略，更利于并发
-            session_pool_size: Optional[int] = 1,  # 默认1
     ) -> str:
         """
         下载文件，先跟踪重定向，再根据文件大小和配置决定单/多线程下载。
@@ -388,12 +500,6 @@ class Downloader:
             headers (Dict[str, str], optional): HTTP 请求头。
             timeout (int): 下载总超时时间（秒）。
             max_redirects (int): 跟踪重定向的最大次数。为0直接下载,不重定向寻找URL
-            multi_session (bool): 是否为每个并发下载线程使用独立的 requests.Session。
-                                  如果为 True，且 session_pool_size 为 None，则每个线程创建新 Session。
-                                  如果为 True，且 session_pool_size 非 None，则从池中复用 Session。
-                                  如果为 False，则所有线程共享 default_session。
-            session_pool_size (int, optional): Session 池大小。仅在 multi_session 为 True 时有效。
-                                                如果为 None，则每个分片线程获得独立的 Session。
 
         返回:
             str: 成功下载后文件的最终路径。
@@ -406,7 +512,7 @@ class Downloader:
         logger.info(f"保存路径:{path}")
 
         logger.debug(
-            f"下载参数: headers={headers}, timeout={timeout}, max_redirects={max_redirects}, multi_session={multi_session}, session_pool_size={session_pool_size}")
+            f"下载参数: headers={headers}, timeout={timeout}, max_redirects={max_redirects}")
         download_start_time = time.perf_counter()  # 记录开始时间
         if max_redirects == 0:
             return self._single_download(url, path, headers, timeout)
@@ -414,30 +520,31 @@ class Downloader:
         # 1. 探测最终 URL 与文件大小
         try:
             logger.debug(f"开始获取final_url")
-            final_url = self._get_final_url(url, headers, timeout, max_redirects)
+            # 一次 Range: bytes=0-0 的 GET 由 requests 自动跟随重定向，
+            # 最终 URL 取 probe.url，总大小取 Content-Range，不读取响应体
+            with self.default_session.get(url, headers={**headers, 'Range': 'bytes=0-0'}, timeout=timeout,
+                                          stream=True, allow_redirects=True) as probe:
+                probe.raise_for_status()
+                if len(probe.history) > max_redirects:
+                    raise DownloadError(f"超过 {max_redirects} 次重定向仍未拿到资源，最后 URL: {probe.url}")
+                final_url = probe.url
+                # 206 响应示例: Content-Range: bytes 0-0/1000
+                total_str = probe.headers.get('Content-Range', '').rpartition('/')[2] \
+                    if probe.status_code == 206 else ''
             logger.debug(f"获取final_url :{final_url}")
-            logger.debug(f"发起HEAD请求内容长度")
-            resp_head = self.default_session.head(final_url, headers=headers, timeout=timeout)
-            logger.debug(f"HEAD请求完成")
-            resp_head.raise_for_status()  # 确保 HEAD 请求成功
-            total_size = int(resp_head.headers.get('Content-Length', 0))
+            total_size = int(total_str) if total_str.isdigit() else 0
             # logger.info(f"文件最终URL: {final_url}, 文件总大小: {Downloader._sizeof_fmt_static(total_size)}")
             if total_size == 0:
-                logger.warning("服务器返回的 Content-Length 为 0，可能文件为空或不支持。尝试单线程下载。")
-                return self._single_download(final_url, path, headers, timeout)
-
-            # 检查是否支持 Range 请求
-            accept_ranges = resp_head.headers.get('Accept-Ranges')
-            if not accept_ranges or 'bytes' not in accept_ranges.lower():
-                logger.warning(f"服务器不支持 Range 请求 ({accept_ranges})，将尝试继续多线程下载")
-                # return self._single_download(final_url, path, headers, timeout)
+                # 服务器忽略了 Range（返回 200）或无法给出大小，多线程分片无从谈起
+                logger.warning("服务器未返回有效的 Content-Range，不支持 Range 请求或无法获取大小。使用单线程下载。")
+                return self._single_download(final_url, path, headers, timeout, skip_head=True)
 
         except DownloadError as e:
             logger.error(f"获取最终 URL 或文件大小失败: {e}")
             raise DownloadError(f"预下载检查失败: {e}") from e
         except requests.exceptions.RequestException as e:
-            logger.error(f"HEAD 请求失败，无法获取文件信息: {e}")
-            raise DownloadError(f"HEAD 请求失败: {e}") from e
+            logger.error(f"Range 探测请求失败，无法获取文件信息: {e}")
+            raise DownloadError(f"Range 探测请求失败: {e}") from e
         except Exception as e:
             logger.error(f"文件预处理阶段发生未知错误: {e}", exc_info=True)
             raise DownloadError(f"文件预处理错误: {e}") from e
@@ -445,101 +552,63 @@ class Downloader:
         # 2. 根据文件大小和并发数决定是否多线程下载
         if total_size < 1024 * 1024 * 2:  # 如果文件小于2MB，或者线程数设置为1，直接单线程下载
             logger.info(f"文件较小 ({Downloader._sizeof_fmt_static(total_size)}) 或线程数设置为1，使用单线程下载。")
-            return self._single_download(final_url, path, headers, timeout)
+            return self._single_download(final_url, path, headers, timeout, skip_head=True, total_size=total_size)
 
         if self.threads == 1:
             logger.info("配置为单线程下载。")
-            return self._single_download(final_url, path, headers, timeout)
-
-        # 3. 构造 Session 池 (如果启用 multi_session)
-        session_pool: List[requests.Session] = []
-        if multi_session:
-            pool_actual_size = session_pool_size if session_pool_size is not None else self.threads
-            logger.info(f"启用多 Session 策略，Session 池大小: {pool_actual_size}")
-            for i in range(pool_actual_size):
-                sess = requests.Session()
-                # 拷贝 default_session 的代理、cookie 等配置
-                sess.trust_env = self.default_session.trust_env
-                sess.proxies = self.default_session.proxies  # 复制代理设置
-                sess.cookies = self.default_session.cookies  # 复制 cookies
-                sess.headers.update(self.default_session.headers)  # 合并默认头
-                session_pool.append(sess)
-                logger.debug(f"Session 池: 创建 Session {i + 1}/{pool_actual_size}")
-        else:
-            logger.debug("禁用多 Session 策略，所有线程共享主 Session。")
-
-        # 4. 初始化共享资源
-        downloaded_counter = [0]  # 用列表包装以便在多线程中传递引用并修改
-        lock = threading.Lock()
-        queue = Queue()  # 用于分片线程将结果回传给主线程
-
-        # 5. 启动进度监控
-        monitor = ProgressMonitor(total_size, downloaded_counter, lock)
+            return self._single_download(final_url, path, headers, timeout, skip_head=True, total_size=total_size)
+
+        # 3. 初始化共享资源
+        # 按 RANGE_CHUNK_SIZE 切成小区间放入队列，由工作线程动态领取（快的线程多领）
+        ranges: Queue = Queue()
+        for start_byte in range(0, total_size, RANGE_CHUNK_SIZE):
+            ranges.put((start_byte, min(start_byte + RANGE_CHUNK_SIZE, total_size) - 1))
+        worker_count = min(self.threads, ranges.qsize())
+        # 每个工作线程一个计数槽，进度监控读取时求和
+        downloaded_counter = array('Q', [0]) * worker_count
+        # 每个工作线程只写自己下标的位置，主线程 join 之后再读取
+        segment_results: List[Optional[str]] = [None] * worker_count
+        abort = threading.Event()
+
+        # 4. 启动进度监控
+        monitor = ProgressMonitor(total_size, downloaded_counter)
         monitor.start()
         logger.debug("进度监控线程已启动。")
 
-        # 6. 分配分片并启动下载线程
-        part_size = total_size // self.threads
-        tmp_files_map = {}  # {start_byte: tmp_path} 存储分片信息
+        # 5. 预分配输出文件，各分片直接写入各自偏移，省去分片临时文件与合并
+        part_path = path + ".part"
+        try:
+            self._preallocate(part_path, total_size)
+        except OSError as e:
+            monitor.stop()
+            logger.critical(f"预分配输出文件失败: {e}. 请检查磁盘空间或权限。", exc_info=True)
+            self._cleanup_temp_files([part_path])
+            raise DownloadError(f"预分配输出文件失败: {e}") from e
+
+        # 启动工作线程
         segment_threads: List[SegmentDownloader] = []
-
-        logger.debug(f"开始多线程分片下载，分片数量：{self.threads}")
-        for i in range(self.threads):
-            start_byte = i * part_size
-            # 最后一个分片处理剩余部分
-            end_byte = (i + 1) * part_size - 1 if i < self.threads - 1 else total_size - 1
-
-            # 如果起始字节大于结束字节，说明文件太小，或者分片逻辑有问题
-            if start_byte > end_byte:
-                logger.warning(f"分片 {i} 的起始字节 {start_byte} 大于结束字节 {end_byte}，跳过此分片。")
-                continue
-
-            tmp_path = f"{path}.part{i}"
-            tmp_files_map[start_byte] = tmp_path
-
-            current_thread_session: requests.Session
-            close_session_flag = False
-
-            if multi_session:
-                if session_pool_size is not None:
-                    # 从 Session 池中获取 Session
-                    current_thread_session = session_pool[i % session_pool_size]
-                    logger.debug(f"分片 {i}: 从 Session 池中复用 Session (索引: {i % session_pool_size})")
-                else:
-                    # 每个线程创建独立的 Session
-                    current_thread_session = requests.Session()
-                    current_thread_session.trust_env = self.default_session.trust_env
-                    current_thread_session.proxies = self.default_session.proxies
-                    current_thread_session.cookies = self.default_session.cookies
-                    current_thread_session.headers.update(self.default_session.headers)
-                    close_session_flag = True  # 独立的 Session 应该由自身关闭
-                    logger.debug(f"分片 {i}: 创建新的独立 Session")
-            else:
-                # 所有线程共享 default_session
-                current_thread_session = self.default_session
-                logger.debug(f"分片 {i}: 共享主 Session")
-
+        logger.debug(f"开始多线程分片下载，区间数量：{ranges.qsize()}，线程数量：{worker_count}")
+        for i in range(worker_count):
             t = SegmentDownloader(
-                session=current_thread_session,
+                session=self.default_session,
                 url=final_url,
-                start_byte=start_byte,
-                end_byte=end_byte,
-                tmp_path=tmp_path,
-                queue=queue,
+                path=part_path,
+                ranges=ranges,
+                results=segment_results,
+                index=i,
                 headers=headers,
                 downloaded_counter=downloaded_counter,
-                lock=lock,
-                close_session_on_finish=close_session_flag  # 告诉 SegmentDownloader 是否关闭其 Session
+                abort=abort,
             )
             segment_threads.append(t)
             t.start()
-            logger.debug(f"分片线程 {t.name} 已启动。下载范围: [{start_byte}-{end_byte}] 到 {tmp_path}")
+            logger.debug(f"分片线程 {t.name} 已启动，写入 {part_path}")
 
-        # 7. 等待分片线程完成，带超时保护
+        # 6. 等待分片线程完成，带超时保护
         all_segments_completed = True
-        thread_join_start_time = time.time()
+        thread_join_start_time = time.monotonic()
         for t in segment_threads:
-            remaining_timeout = timeout - (time.time() - thread_join_start_time)
+            remaining_timeout = timeout - (time.monotonic() - thread_join_start_time)
             if remaining_timeout <= 0:
                 logger.warning(f"下载总超时 ({timeout}s) 已耗尽，未能等待所有分片线程完成。")
                 all_segments_completed = False
@@ -557,63 +626,34 @@ class Downloader:
         if monitor.is_alive():
             logger.warning("进度监控器未能在规定时间内停止。")
 
-        # 关闭 Session 池中的所有 Session
-        if multi_session and session_pool_size is not None:
-            for i, sess in enumerate(session_pool):
-                try:
-                    sess.close()
-                    logger.debug(f"Session 池: Session {i} 已关闭。")
-                except Exception as e:
-                    logger.warning(f"Session 池: 关闭 Session {i} 失败: {e}")
-
         if not all_segments_completed:
+            abort.set()  # 让仍在运行的线程领完手上的区间后退出
             logger.error("部分或所有分片线程未成功完成，回退到单线程下载。")
-            self._cleanup_temp_files(list(tmp_files_map.values()))  # 清理已生成的分片文件
-            return self._single_download(final_url, path, headers, timeout)
-
-        # 8. 收集分片结果
-        segments_results: Dict[int, Optional[str]] = {}
-        while not queue.empty():
-            start_b, tmp_p = queue.get()
-            segments_results[start_b] = tmp_p
-
-        # 检查是否有分片下载失败（结果为 None）
-        if any(tmp_file is None for tmp_file in segments_results.values()):
-            failed_segments = [s for s, t in segments_results.items() if t is None]
+            self._cleanup_temp_files([part_path])  # 清理未完成的输出文件
+            return self._single_download(final_url, path, headers, timeout, skip_head=True, total_size=total_size)
+
+        # 7. 检查是否有分片下载失败（结果为 None）
+        if any(r is None for r in segment_results):
+            failed_segments = [i for i, r in enumerate(segment_results) if r is None]
             logger.error(
-                f"检测到 {len(failed_segments)} 个分片下载失败，将回退到单线程下载。失败分片起始字节: {failed_segments}")
-            self._cleanup_temp_files(list(tmp_files_map.values()))  # 清理已生成的分片文件
-            return self._single_download(final_url, path, headers, timeout)
+                f"检测到 {len(failed_segments)} 个分片线程未完成，将回退到单线程下载。线程序号: {failed_segments}")
+            self._cleanup_temp_files([part_path])  # 清理未完成的输出文件
+            return self._single_download(final_url, path, headers, timeout, skip_head=True, total_size=total_size)
 
-        # 9. 合并分片
-        final_merged_tmp_path = path + ".merged_tmp"
+        # 8. 所有分片已写入 .part，原子性替换为最终文件（临时文件上传后即清理，不额外 fsync）
         try:
-            with open(final_merged_tmp_path, 'wb') as outf:
-                # 按照字节起始位置排序，确保合并顺序正确
-                for start_b, tmp_file in sorted(segments_results.items(), key=lambda kv: kv[0]):
-                    logger.debug(f"合并分片: 从 {tmp_file} (起始 {start_b}) 写入到 {final_merged_tmp_path}")
-                    with open(tmp_file, 'rb') as inf:
-                        outf.write(inf.read())
-                    os.remove(tmp_file)  # 合并后删除临时分片文件
-                    logger.debug(f"已删除临时分片文件: {tmp_file}")
-
-            # 原子性替换最终文件
-            os.replace(final_merged_tmp_path, path)
-            logger.info(f"多线程下载成功并合并文件到: {path}")
+            os.replace(part_path, path)
+            logger.info(f"多线程下载成功，文件已保存到: {path}")
             logger.info(
                 f"下载任务完成: {path} (总耗时: {time.perf_counter() - download_start_time:.2f}秒)")  # 增加结束打点
             return path
-        except IOError as e:
-            logger.critical(f"文件合并或移动失败: {e}. 请检查磁盘空间或权限。", exc_info=True)
-            self._cleanup_temp_files([final_merged_tmp_path])  # 尝试清理合并失败的临时文件
-            raise DownloadError(f"文件合并失败: {e}") from e
-        except Exception as e:
-            logger.critical(f"合并分片过程中发生未知错误: {e}", exc_info=True)
-            self._cleanup_temp_files([final_merged_tmp_path])
-            raise DownloadError(f"合并分片未知错误: {e}") from e
+        except OSError as e:
+            logger.critical(f"文件移动失败: {e}. 请检查磁盘空间或权限。", exc_info=True)
+            self._cleanup_temp_files([part_path])
+            raise DownloadError(f"文件移动失败: {e}") from e
 
     def _single_download(self, url: str, path: str, headers: Dict[str, str], timeout: int, skip_head=False,
-                         retry=3) -> str:
+                         retry=3, total_size: int = 0) -> str:
         """
         执行单线程文件下载，包含进度显示。
 
@@ -622,6 +662,8 @@ class Downloader:
             path (str): 输出文件路径。
             headers (Dict[str, str]): HTTP 请求头。
             timeout (int): 请求超时时间。
+            skip_head (bool): 跳过 HEAD 请求；download() 的 Range 探测已拿到最终 URL 与大小时传 True，省一次往返。
+            total_size (int): 调用方已知的文件大小，仅用于日志，0 表示未知。
 
         返回:
             str: 成功下载后文件的最终路径。
@@ -630,14 +672,14 @@ class Downloader:
             DownloadError: 如果下载过程中发生错误。
         """
         tmp_path = path + '.single_part'
-        downloaded_counter = [0]  # 共享计数器
-        lock = threading.Lock()
+        downloaded_counter = array('Q', [0])  # 单线程计数器，仅本线程写入
         logger.info(f"单线程下载开始")
         single_download_start_time = time.perf_counter()
 
         # 再次 HEAD 请求获取文件大小，确保准确性
-        total_size = 0
-        if not skip_head:
+        if skip_head:
+            logger.info(f"单线程下载开始。URL: {url}, 总大小: {Downloader._sizeof_fmt_static(total_size)}")
+        else:
             try:
                 resp_head = self.default_session.head(url, headers=headers, timeout=timeout)
                 resp_head.raise_for_status()
@@ -647,28 +689,28 @@ class Downloader:
                 logger.warning(f"单线程下载获取文件大小失败，可能无法显示总进度: {e}")
                 # 即使获取不到总大小，也尝试继续下载
 
-        # monitor = ProgressMonitor(total_size, downloaded_counter, lock)
+        # monitor = ProgressMonitor(total_size, downloaded_counter)
         # monitor.start()
         # logger.debug("单线程下载的进度监控线程已启动。")
 
+        mv = memoryview(bytearray(CHUNK_SIZE))  # 各次重试复用同一块接收缓冲
+
         for _ in range(0, retry):
             try:
                 with self.default_session.get(url, headers=headers, stream=True, timeout=timeout) as r:
                     curl = prepared_to_curl(r.request)
                     r.raise_for_status()  # 检查 HTTP 状态码
 
-                    # 确保每次下载前清理旧的临时文件
-                    if os.path.exists(tmp_path):
-                        logger.warning(f"单线程临时文件 {tmp_path} 已存在，将覆盖。")
-                        os.remove(tmp_path)
-
-                    with open(tmp_path, 'wb') as f:
-                        for chunk in r.iter_content(8192):
-                            if not chunk:
-                                continue
-                            f.write(chunk)
-                            with lock:  # 更新共享计数器
-                                downloaded_counter[0] += len(chunk)
+                    # open(..., 'wb') 会截断已存在的旧临时文件，无需先检查再删除
+                    # 每次最多读入 1MiB，不再套一层用户态写缓冲；无缓冲 write 可能只写出一部分，由 _write_all 补齐
+                    with open(tmp_path, 'wb', buffering=0) as f:
+                        r.raw.decode_content = True
+                        while True:
+                            n = r.raw.readinto(mv)
+                            if not n:
+                                break
+                            _write_all(f, mv[:n])
+                            downloaded_counter[0] += n
 
                     # monitor.stop()  # 停止进度监控
                     # monitor.join(timeout=5)
@@ -682,7 +724,7 @@ class Downloader:
                         f"单线程下载成功 (总耗时: {time.perf_counter() - single_download_start_time:.4f}秒)")  # <--- 在这里增加结束打点
 
                     return path
-            except requests.exceptions.RequestException as e:
+            except (requests.exceptions.RequestException, Urllib3HTTPError) as e:
                 logger.error(f"单线程下载请求失败: {e}. cURL: {curl}", exc_info=True)
                 continue
                 # raise DownloadError(f"单线程下载失败: {e}") from e
@@ -699,14 +741,30 @@ class Downloader:
                 self._cleanup_temp_files([tmp_path])
         return path
 
+    @staticmethod
+    def _preallocate(file_path: str, size: int):
+        """
+        创建输出文件并预分配 size 字节，供各分片按偏移写入。
+        优先使用 posix_fallocate 真正分配磁盘块，不支持时退回 truncate 扩展文件长度。
+        """
+        with open(file_path, 'wb') as f:
+            if hasattr(os, 'posix_fallocate'):
+                try:
+                    os.posix_fallocate(f.fileno(), 0, size)
+                    return
+                except OSError as e:
+                    logger.debug(f"posix_fallocate 不可用，改用 truncate: {e}")
+            f.truncate(size)
+
     def _cleanup_temp_files(self, file_paths: List[str]):
         """
         清理指定的临时文件。
         """
         for fp in file_paths:
-            if os.path.exists(fp):
-                try:
-                    os.remove(fp)
-                    logger.debug(f"已清理临时文件: {fp}")
-                except OSError as e:
-                    logger.warning(f"无法删除临时文件 {fp}: {e}. 请手动清理。", exc_info=True)
+            try:
+                os.unlink(fp)
+                logger.debug(f"已清理临时文件: {fp}")
+            except FileNotFoundError:
+                pass  # 文件本就不存在（如下载成功后已被 os.replace 移走）
+            except OSError as e:
+                logger.warning(f"无法删除临时文件 {fp}: {e}. 请手动清理。", exc_info=True)
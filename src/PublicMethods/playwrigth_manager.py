@@ -1,18 +1,49 @@
 # playwright_manager.py
 import atexit
+import json
+import os
+import shlex
+import tempfile
+import time
 import uuid
+from pathlib import Path
+from types import MappingProxyType
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
 from playwright.async_api import async_playwright, Playwright, Browser, BrowserContext
 import logging
 import asyncio
 
 log = logging.getLogger(__name__)
 
+# 多进程共用一个 Chromium：根进程执行 `python -m PublicMethods.playwrigth_manager`（在 src 目录下）
+# 调用 launch_and_publish_endpoint() 启动浏览器并写出 endpoint 文件，
+# 其他进程设置环境变量 PLAYWRIGHT_CDP_ENDPOINT（值见该文件）即改为 connect_over_cdp 连接
+CDP_ENDPOINT_ENV = "PLAYWRIGHT_CDP_ENDPOINT"
+CDP_ENDPOINT_FILE = Path(tempfile.gettempdir()) / "playwright_cdp.url"
+
+# 机器人只有少量并发 Context，精简 Chromium 辅助进程；Playwright 默认已关闭沙箱，--no-zygote 可直接使用
+_LIGHT_CHROME_ARGS = ['--no-zygote', '--disable-gpu', '--disable-dev-shm-usage']
+# 额外启动参数（空格分隔，支持引号），附加在所有 launch 参数之后
+EXTRA_CHROME_ARGS = shlex.split(os.getenv("EXTRA_CHROME_ARGS", ""))
+
 
 class PlaywrightManager:
     _playwright: Playwright | None = None
     _browser: Browser | None = None
     _browser_id: str | None = None  # 新增：全局唯一标识
     _fingerprint: dict | None = None  # ← 一定要有
+    _fingerprint_ctx_kwargs: MappingProxyType | None = None  # 由 _fingerprint 预先生成的 new_context 参数
+    _init_script: str | None = None  # new_context 不支持的指纹字段，改由页面初始化脚本注入
+    # Context 复用池：只对带 storage_key 的 Context 按参数分池复用（同一平台本就共享登录态），
+    # 匿名 Context 的 localStorage / IndexedDB / HTTP 缓存 / Service Worker 无法可靠清空，用完即关
+    _ctx_pools: dict[tuple, asyncio.Queue] = {}
+    _ctx_use_count: dict[int, int] = {}
+    _pool_size = 4  # 每种 Context 最多保留的空闲数量
+    _max_uses = 50  # 单个 Context 复用次数上限，到达后关闭重建，防止内部对象累积
+    # 按平台持久化的登录态（cookies / localStorage），每个平台一个 JSON，互不混用
+    _storage_state_dir: Path | None = Path(__file__).with_name("storage_state")
+    _storage_state_ttl = 7 * 24 * 3600  # 超过该时长的登录态视为过期，不再载入
 
     @classmethod
     def set_default_fingerprint(cls) -> None:
@@ -50,8 +81,52 @@ class PlaywrightManager:
                 "WebKit built-in PDF",
             ],
         }
+        fp = cls._fingerprint
+        cls._fingerprint_ctx_kwargs = MappingProxyType({
+            k: fp[k] for k in ("user_agent", "locale", "timezone_id", "extra_http_headers", "viewport")
+        })
+        cls._init_script = cls._build_init_script(fp)
         log.info("[PlaywrightManager] 已载入默认指纹配置")
 
+    @staticmethod
+    def _build_init_script(fp: dict) -> str:
+        """
+        生成覆盖 hardwareConcurrency / deviceMemory / plugins / WebGL 厂商信息的初始化脚本，
+        这些字段 new_context() 无法直接设置。值经 json.dumps 转义后内联。
+        """
+        return f"""
+(() => {{
+  const def = (obj, key, value) => Object.defineProperty(obj, key, {{ get: () => value }});
+  def(navigator, 'hardwareConcurrency', {json.dumps(fp["hardware_concurrency"])});
+  def(navigator, 'deviceMemory', {json.dumps(fp["device_memory"])});
+  def(navigator, 'plugins', {json.dumps(fp["plugins"])}.map(name => ({{
+    name, filename: 'internal-pdf-viewer', description: 'Portable Document Format'
+  }})));
+  const vendor = {json.dumps(fp["webgl_vendor"])}, renderer = {json.dumps(fp["webgl_renderer"])};
+  for (const ctx of [window.WebGLRenderingContext, window.WebGL2RenderingContext]) {{
+    if (!ctx) continue;
+    const getParameter = ctx.prototype.getParameter;
+    ctx.prototype.getParameter = function (p) {{
+      if (p === 37445) return vendor;    // UNMASKED_VENDOR_WEBGL
+      if (p === 37446) return renderer;  // UNMASKED_RENDERER_WEBGL
+      return getParameter.call(this, p);
+    }};
+  }}
+}})();
+"""
+
+    @staticmethod
+    def _launch_args(simple_args: bool = True) -> list[str]:
+        """本地启动与共享浏览器共用的 Chromium 启动参数，保证两种模式行为一致"""
+        if simple_args:
+            # Chromium 没有 --disable-images，真正生效的禁图开关是 blink-settings
+            return ['--blink-settings=imagesEnabled=false', *_LIGHT_CHROME_ARGS, *EXTRA_CHROME_ARGS]
+        return [
+            '--disable-blink-features=AutomationControlled',  # 去掉AutomationControlled标识
+            "--disable-features=IsolateOrigins,site-per-process",  # ③ 常见跨站检测绕过
+            *EXTRA_CHROME_ARGS,
+        ]
+
     @classmethod
     async def init(cls, headless=True, simple_args=True) -> tuple[Playwright, Browser]:
         """
@@ -59,29 +134,50 @@ class PlaywrightManager:
         """
         if cls._playwright is None:
             cls._playwright = await async_playwright().start()
-            if simple_args:
-                cls._browser = await cls._playwright.chromium.launch(
-                    headless=headless,
-                    args=['--disable-images'],  # 保留原注释：禁用图片
-                    # args=[
-                    #     '--disable-blink-features=AutomationControlled',  # 去掉AutomationControlled标识
-                    #     "--disable-features=IsolateOrigins,site-per-process"]  # ③ 常见跨站检测绕过
-                )
+            if endpoint := os.getenv(CDP_ENDPOINT_ENV):
+                # 连接已有浏览器，启动参数由根进程决定
+                cls._browser = await cls._playwright.chromium.connect_over_cdp(endpoint)
+                log.info("[PlaywrightManager] 已通过 CDP 连接共享浏览器: %s", endpoint)
             else:
                 cls._browser = await cls._playwright.chromium.launch(
-                    headless=headless,
-                    # args=['--disable-images'],  # 保留原注释：禁用图片
-                    args=[
-                        '--disable-blink-features=AutomationControlled',  # 去掉AutomationControlled标识
-                        "--disable-features=IsolateOrigins,site-per-process"]  # ③ 常见跨站检测绕过
-                )
+                    headless=headless, args=cls._launch_args(simple_args))
             # 第一次启动时生成唯一 ID
             cls._browser_id = str(uuid.uuid4())
-            log.info(f"[PlaywrightManager] 浏览器首次启动，Browser ID={cls._browser_id}")
+            log.info("[PlaywrightManager] 浏览器首次启动，Browser ID=%s", cls._browser_id)
         else:
-            log.debug(f"[PlaywrightManager] 已复用浏览器，Browser ID={cls._browser_id}")
+            log.debug("[PlaywrightManager] 已复用浏览器，Browser ID=%s", cls._browser_id)
         return cls._playwright, cls._browser  # type: ignore
 
+    @classmethod
+    async def launch_and_publish_endpoint(
+            cls,
+            port: int = 9222,
+            headless: bool = True,
+            path: Path = CDP_ENDPOINT_FILE,
+            simple_args: bool = True,
+    ) -> str:
+        """
+        根进程调用：以与 init() 相同的启动参数启动带远程调试端口的浏览器，并把 CDP endpoint 写入 path，
+        供其他进程通过 PLAYWRIGHT_CDP_ENDPOINT 连接复用。返回 endpoint。
+        CDP 端口没有鉴权，能连上的进程即可完全控制浏览器（包括已持久化的登录态），因此只监听 127.0.0.1。
+        """
+        if cls._playwright is None:
+            cls._playwright = await async_playwright().start()
+        if cls._browser is None:
+            cls._browser = await cls._playwright.chromium.launch(
+                headless=headless,
+                args=[
+                    *cls._launch_args(simple_args),
+                    "--remote-debugging-address=127.0.0.1",
+                    f"--remote-debugging-port={port}",
+                ],
+            )
+            cls._browser_id = str(uuid.uuid4())
+            log.info("[PlaywrightManager] 共享浏览器已启动，Browser ID=%s", cls._browser_id)
+        endpoint = f"http://127.0.0.1:{port}"
+        Path(path).write_text(endpoint, encoding="utf-8")
+        return endpoint
+
     @classmethod
     async def get_browser(cls, headless=True, simple_args=True) -> Browser:
         """
@@ -92,16 +188,17 @@ class PlaywrightManager:
             # 还未 init，则先初始化
             await cls.init(headless, simple_args)
         # 每次取用时都 log 一下 ID，方便排查是否复用
-        log.debug(f"[PlaywrightManager] get_browser 调用，当前 Browser ID={cls._browser_id}")
+        log.debug("[PlaywrightManager] get_browser 调用，当前 Browser ID=%s", cls._browser_id)
         return cls._browser  # type: ignore
 
     @classmethod
-    async def new_context(cls, headless=True, proxy_config=None, simple_args=True) -> BrowserContext:
+    async def new_context(cls, headless=True, proxy_config=None, simple_args=True,
+                          storage_state: str | None = None) -> BrowserContext:
         """
         为每次业务请求创建隔离的 Context
         """
         browser = await cls.get_browser(headless, simple_args)
-        return await browser.new_context(proxy=proxy_config)
+        return await browser.new_context(proxy=proxy_config, storage_state=storage_state)
 
     @classmethod
     async def new_cookie_context(
@@ -109,33 +206,113 @@ class PlaywrightManager:
             headless: bool = True,
             proxy_config: dict | None = None,
             with_fingerprint: bool = True,
+            storage_state: str | None = None,
     ) -> BrowserContext:
 
         browser = await cls.get_browser(headless, simple_args=False)
         ctx_kwargs: dict = {"proxy": proxy_config} if proxy_config else {}
-
-        if with_fingerprint and cls._fingerprint:
-            fp = cls._fingerprint
-            ctx_kwargs.update(
-                user_agent=fp["user_agent"],
-                locale=fp["locale"],
-                timezone_id=fp["timezone_id"],
-                extra_http_headers=fp["extra_http_headers"],
-                viewport=fp["viewport"],
-            )
+        if with_fingerprint and cls._fingerprint_ctx_kwargs:
+            ctx_kwargs.update(cls._fingerprint_ctx_kwargs)
+        if storage_state:
+            ctx_kwargs["storage_state"] = storage_state
 
         # ★ 创建前再次打印，确保真正写进了 ctx_kwargs
-        log.debug(
-            "[PlaywrightManager] 即将创建 Context, 指纹片段: %s",
-            {k: ctx_kwargs.get(k) for k in ("user_agent", "locale", "timezone_id", "viewport")}
-        )
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug(
+                "[PlaywrightManager] 即将创建 Context, 指纹片段: %s",
+                {k: ctx_kwargs.get(k) for k in ("user_agent", "locale", "timezone_id", "viewport")}
+            )
 
         ctx = await browser.new_context(**ctx_kwargs)
+        if with_fingerprint and cls._init_script:
+            await ctx.add_init_script(script=cls._init_script)
         return ctx
 
+    @classmethod
+    @asynccontextmanager
+    async def acquire_context(
+            cls,
+            headless: bool = True,
+            proxy_config: dict | None = None,
+            with_cookie: bool = False,
+            with_fingerprint: bool = True,
+            storage_key: str | None = None,
+    ) -> AsyncIterator[BrowserContext]:
+        """
+        借出一个 Context，退出 async with 时归还。
+        with_cookie=True 等价于 new_cookie_context()，否则等价于 new_context()。
+        storage_key（如平台名）非空时持久化登录态：新建时载入未过期的 storage_state，归还时写回磁盘；
+        这类 Context 按平台放入复用池，关闭页面、清空权限后供同平台下次请求复用，
+        复用次数到上限或池已满则直接关闭。
+        storage_key 为空的 Context 不复用，归还时直接关闭，保证不同请求之间的站点存储互相隔离。
+        """
+        key = (with_cookie, with_cookie and with_fingerprint, repr(proxy_config), storage_key)
+        pool = cls._ctx_pools.setdefault(key, asyncio.Queue(maxsize=cls._pool_size)) if storage_key else None
+        state_path = cls._storage_state_path(storage_key)
+        ctx = None
+        if pool is not None:
+            try:
+                ctx = pool.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+        if ctx is None:
+            storage_state = str(state_path) if state_path and cls._storage_state_fresh(state_path) else None
+            if with_cookie:
+                ctx = await cls.new_cookie_context(headless, proxy_config, with_fingerprint, storage_state)
+            else:
+                ctx = await cls.new_context(headless, proxy_config, storage_state=storage_state)
+        try:
+            yield ctx
+        finally:
+            await cls._release_context(ctx, key, pool, state_path)
+
+    @classmethod
+    def _storage_state_path(cls, storage_key: str | None) -> Path | None:
+        if not storage_key or cls._storage_state_dir is None:
+            return None
+        return cls._storage_state_dir / f"{storage_key}.json"
+
+    @classmethod
+    def _storage_state_fresh(cls, path: Path) -> bool:
+        try:
+            return time.time() - path.stat().st_mtime < cls._storage_state_ttl
+        except OSError:
+            return False
+
+    @classmethod
+    async def _release_context(cls, ctx: BrowserContext, key: tuple, pool: asyncio.Queue | None,
+                               state_path: Path | None = None) -> None:
+        if state_path is not None:
+            try:
+                state_path.parent.mkdir(parents=True, exist_ok=True)
+                await ctx.storage_state(path=state_path)
+            except Exception as e:
+                log.debug("[PlaywrightManager] 保存登录态失败 %s: %r", state_path.name, e)
+        uses = cls._ctx_use_count.pop(id(ctx), 0) + 1
+        # 匿名 Context（pool 为 None）不复用；期间调用过 close() 时池已被替换，旧 Context 不再放回
+        if pool is not None and uses < cls._max_uses and cls._ctx_pools.get(key) is pool and not pool.full():
+            try:
+                for page in list(ctx.pages):
+                    await page.close()
+                await ctx.clear_permissions()
+                pool.put_nowait(ctx)
+                cls._ctx_use_count[id(ctx)] = uses
+                return
+            except asyncio.QueueFull:
+                pass
+            except Exception as e:
+                log.debug("[PlaywrightManager] 清理 Context 失败，改为关闭: %r", e)
+        try:
+            await ctx.close()
+        except Exception as e:
+            log.debug("[PlaywrightManager] 关闭 Context 时忽略异常: %r", e)
+
     @classmethod
     async def close(cls):
         """安全关闭 Browser 与 Playwright，允许多次调用且不抛异常"""
+        # 池中的 Context 随 Browser 一起关闭，这里只丢弃引用
+        cls._ctx_pools = {}
+        cls._ctx_use_count.clear()
         try:
             # 1️⃣ 先停 Playwright（它会顺带关掉所有 Browser）
             if cls._playwright is not None:
@@ -155,35 +332,73 @@ class PlaywrightManager:
 
         except Exception as e:
             # 捕获所有异常，防止退出流程中断
-            log.warning(f"[PlaywrightManager] 关闭时出现非致命异常: {e!r}")
+            log.warning("[PlaywrightManager] 关闭时出现非致命异常: %r", e)
 
 
 # 注册进程退出时的清理钩子，保证整个程序结束前关闭浏览器
 def _shutdown():
     """
-    atexit 钩子：在解释器退出前确保异步资源被清理
+    atexit 钩子：在解释器退出前确保异步资源被清理。
+    长驻服务应在自己的事件循环上 await PlaywrightManager.close()（Bot 在 post_shutdown 中调用），
+    此处仅为独立脚本兜底；已关闭时直接返回。
     """
-    try:
-        loop = asyncio.get_event_loop()
-    except RuntimeError:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
+    if PlaywrightManager._playwright is None and PlaywrightManager._browser is None:
+        return  # 从未启动浏览器（或已关闭），无需建事件循环
 
     async def _safe_close():
         try:
             await PlaywrightManager.close()
         except Exception as e:
             # 最终兜底，绝不让异常向外冒
-            log.debug(f"[PlaywrightManager] _shutdown 忽略异常: {e!r}")
-
-    if loop.is_closed():
-        # 已经没有事件循环 → 同步跑完
-        asyncio.run(_safe_close())
-    elif loop.is_running():
-        # 事件循环还在跑 → 排队到事件循环里
-        asyncio.ensure_future(_safe_close())
-    else:
+            log.debug("[PlaywrightManager] _shutdown 忽略异常: %r", e)
+
+    try:
+        loop = asyncio.get_event_loop_policy().get_event_loop()
+    except RuntimeError:
+        loop = None
+
+    if loop is not None and loop.is_running():
+        # 事件循环还在跑 → 排队到事件循环里，进程退出时未必来得及执行
+        loop.create_task(_safe_close())
+        log.warning("[PlaywrightManager] 退出时事件循环仍在运行，已排队关闭浏览器")
+    elif loop is not None and not loop.is_closed():
         loop.run_until_complete(_safe_close())
+    else:
+        # 没有可用的事件循环 → 临时建一个跑完即关
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(_safe_close())
+        finally:
+            loop.close()
 
 
 atexit.register(_shutdown)
+
+
+async def _serve_shared_browser(port: int, headless: bool, simple_args: bool):
+    """启动共享浏览器并保持运行，直到进程被中断；退出时关闭浏览器并删除 endpoint 文件。"""
+    endpoint = await PlaywrightManager.launch_and_publish_endpoint(
+        port=port, headless=headless, simple_args=simple_args)
+    log.info("[PlaywrightManager] 共享浏览器 CDP endpoint: %s（已写入 %s）", endpoint, CDP_ENDPOINT_FILE)
+    print(f"export {CDP_ENDPOINT_ENV}={endpoint}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        CDP_ENDPOINT_FILE.unlink(missing_ok=True)
+        await PlaywrightManager.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(description="启动供多个进程共用的 Chromium，并发布 CDP endpoint")
+    arg_parser.add_argument("--port", type=int, default=9222, help="远程调试端口（仅监听 127.0.0.1）")
+    arg_parser.add_argument("--headful", action="store_true", help="以有界面模式启动")
+    arg_parser.add_argument("--full-args", action="store_true",
+                            help="使用指纹场景的启动参数（对应 simple_args=False），默认使用精简参数")
+    cli_args = arg_parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(_serve_shared_browser(cli_args.port, not cli_args.headful, not cli_args.full_args))
+    except KeyboardInterrupt:
+        pass
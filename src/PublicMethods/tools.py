@@ -1,46 +1,90 @@
+import json
 import os
-from pathlib import Path
-from typing import Any, List, Optional, Union
-from requests import PreparedRequest
+from functools import lru_cache
+from typing import Any, List, Optional, Union, TYPE_CHECKING
 from shlex import quote as sh
 
-def check_file_size(file_path: str or Path, max_size_mb: float = None, ndigits=2) -> bool | float:
+if TYPE_CHECKING:
+    from requests import PreparedRequest
+
+try:
+    import orjson
+except ImportError:  # 未安装 orjson 时退回标准库 json
+    orjson = None
+
+
+def json_loads(data: bytes | str) -> Any:
+    """
+    解析 JSON 文本。已安装 orjson 时直接解析 bytes，省去一次 UTF-8 解码。
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def json_dumps(obj: Any, indent: bool = False) -> bytes:
+    """
+    序列化为 UTF-8 编码的 JSON bytes（非 ASCII 字符原样输出）。已安装 orjson 时直接得到 bytes，无中间 str。
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(obj, ensure_ascii=False, indent=2 if indent else None).encode("utf-8")
+
+
+MB = 1 << 20
+
+
+def file_under_bytes(file_path: str | os.PathLike[str], limit_bytes: int) -> bool:
+    """文件大小是否不超过 limit_bytes 字节。体积门限判断直接按整数字节比较。"""
+    return os.stat(os.fspath(file_path)).st_size <= limit_bytes
+
+
+def check_file_size(file_path: str | os.PathLike[str], max_size_mb: float = None, ndigits=2) -> bool | float:
     """
     检查文件大小，是否超过指定限制。
     :param file_path: 文件路径
     :param max_size_mb: 最大文件大小，单位 MB
     :return: 如果文件大小小于等于 max_size_mb，则返回 True，否则返回 False
     """
-    file_size = os.path.getsize(file_path) / (1024 * 1024)  # 转换为 MB
+    file_path = os.fspath(file_path)
     if max_size_mb:
-        return file_size <= max_size_mb
-    else:
-        return round(file_size, ndigits)
+        return file_under_bytes(file_path, int(max_size_mb * MB))
+    return round(os.stat(file_path).st_size / MB, ndigits)
 
 
-def prepared_to_curl(prep: PreparedRequest) -> str:
+def prepared_to_curl(prep: 'PreparedRequest') -> str:
     """
     把 PreparedRequest 转换成等效 cURL 命令。
     Usage:
         resp = session.send(prep)
         print(prepared_to_curl(prep))
     """
-    cmd = ["curl", "-X", prep.method]
-    # headers
-    for k, v in prep.headers.items():
-        cmd += ["-H", sh(f"{k}: {v}")]
-    # body
-    if prep.body:
-        cmd += ["--data-binary", sh(prep.body if isinstance(prep.body, str) else prep.body.decode())]
-    cmd.append(sh(prep.url))
-    return ' '.join(cmd)
+    # 每个请求头都含 ": "，必然需要加引号；shlex.quote 本身对安全串会原样返回
+    parts = [f"curl -X {prep.method}"]
+    parts.extend(f"-H {sh(f'{k}: {v}')}" for k, v in prep.headers.items())
+    body = prep.body
+    if body:
+        # 二进制 body 按 UTF-8 容错解码，仅用于日志展示，避免 UnicodeDecodeError
+        if not isinstance(body, str):
+            body = body.decode(errors="replace")
+        parts.append(f"--data-binary {sh(body)}")
+    parts.append(sh(prep.url))
+    return ' '.join(parts)
+
+
+@lru_cache(maxsize=128)
+def _split_path(parent_path: str | None) -> tuple[str, ...]:
+    """parent_path 多为调用方常量，拆分结果按字符串缓存"""
+    return tuple(parent_path.split('.')) if parent_path else ()
+
 
 # 嵌套JSON直取目标值
 def collect_values(
     obj: Any,
     target_key: str,
-    parent_path: str | None = None
-) -> Optional[Union[Any, List[Any]]] or dict:
+    parent_path: str | None = None,
+    first_only: bool = False,
+) -> Optional[Union[Any, List[Any]]]:
     """
     在嵌套 dict / list 结构中查找：
         • 父级键路径后缀 == parent_path（为空则忽略）
@@ -49,27 +93,27 @@ def collect_values(
         • 0 个命中  → None
         • 1 个命中  → 单值，保持原始类型
         • ≥2 个命中 → 列表
+    first_only=True 时在第一个命中处立即返回该值（先序 DFS 顺序），不再遍历剩余部分。
     """
-    path_parts = parent_path.split('.') if parent_path else []
+    path_parts = _split_path(parent_path)
+    plen = len(path_parts)
     matches: List[Any] = []
 
-    def dfs(node: Any, key_stack: List[str]) -> None:
-        if isinstance(node, dict):
+    # 显式栈迭代代替递归；子节点逆序入栈，保证命中顺序与先序 DFS 一致
+    stack: List[tuple] = [(obj, ())]
+    while stack:
+        node, key_stack = stack.pop()
+        # 节点来自 JSON 解析，只会是精确的 dict / list；type() is 比 isinstance 少走一次 MRO 检查
+        node_type = type(node)
+        if node_type is dict:
             # 满足父级路径条件时收集
-            if (not path_parts or
-                len(key_stack) >= len(path_parts) and
-                key_stack[-len(path_parts):] == path_parts):
-                if target_key in node:
-                    matches.append(node[target_key])
-
-            for k, v in node.items():
-                dfs(v, key_stack + [k])
-
-        elif isinstance(node, list):
-            for item in node:
-                dfs(item, key_stack)
-
-    dfs(obj, [])
+            if (not plen or key_stack[-plen:] == path_parts) and target_key in node:
+                if first_only:
+                    return node[target_key]
+                matches.append(node[target_key])
+            stack.extend((v, key_stack + (k,)) for k, v in reversed(node.items()))
+        elif node_type is list:
+            stack.extend((item, key_stack) for item in reversed(node))
 
     if not matches:
         return None
@@ -14,20 +14,67 @@ from TelegramBot.handlers import (bilibili, douyin, music,
                                   )
 
 
+# 需要注入限频器、任务管理器的 handler 模块
+_SINGLETON_MODULES = (bilibili, douyin, music, status)
+
+
 def _inject_singletons(app):
     """向各 handler 模块注入同一个限频器、任务管理器实例。"""
     limiter = RateLimiter(MIN_MSG_INTERVAL)
     manager = TaskManager()
-    for mod in (bilibili, douyin, music, status):
+    for mod in _SINGLETON_MODULES:
         mod.rate_limiter = limiter
         mod.task_manager = manager
 
 
+# 默认 /start
+async def _start(update, ctx):
+    await update.message.reply_text("欢迎！直接发送视频链接开始下载。")
+
+
+# —— 命令表：(命令名, 回调) ——
+_COMMAND_HANDLERS = (
+    ("start", _start),
+    # 查询解析记录,支持参数 uid, 10:最新10个
+    ("showlog", parser.showlog_command),
+
+    # 查询缓存记录,参数 vid
+    ("getcache", cache.getcache_command),
+    ("delcache", cache.delcache_command),
+    ("showcache", cache.showcache_command),
+
+    # 查询添加黑名单, 参数 uid
+    ("blacklist_add", blacklist.handle_blacklist_add_command),
+    ("blacklist_remove", blacklist.handle_blacklist_remove_command),
+    ("blacklist_show", blacklist.handle_blacklist_show_command),
+
+    ("notify", notify.notify_cmd),
+    ("status", status.handle_status_command),
+
+    # 暂时以下这些命令未开放使用,先放着看后续是否有需求
+    ("bilibili", bilibili.bilibili_command),
+    ("douyin", douyin.douyin_command),
+    ("music", music.music_command),
+    ("xhs", xiaohongshu.xhs_command),
+    ("tiktok", tiktok.tiktok_command),
+)
+
+
 # —— 通知函数 ——
 async def _notify_startup(app):
     await app.bot.send_message(chat_id=ADMIN_ID, text="🤖 Bot 服务已启动 ✅")
 
 
+async def _on_shutdown(app):
+    """在 Bot 自己的事件循环上关闭共享浏览器与音乐解析的 HTTP 客户端，run_polling 收到 SIGINT/SIGTERM 停止后调用"""
+    from PublicMethods.playwrigth_manager import PlaywrightManager
+    from MusicDownload.download_music import aclose_async_client
+    try:
+        await PlaywrightManager.close()
+    finally:
+        await aclose_async_client()
+
+
 def main() -> None:
     token = TELEGRAM_TOKEN_ENV
     if not token:
@@ -39,38 +86,17 @@ def main() -> None:
         .token(token)
         .concurrent_updates(True)  # 允许并发处理更新
         .post_init(_notify_startup)
+        .post_shutdown(_on_shutdown)
         .build()
     )
 
     _inject_singletons(application)
 
     # 注册命令
-    application.add_handler(CommandHandler("start", _start))
-    # 查询解析记录,支持参数 uid, 10:最新10个
-    application.add_handler(CommandHandler("showlog", parser.showlog_command))
-
-    # 查询缓存记录,参数 vid
-    application.add_handler(CommandHandler("getcache", cache.getcache_command))
-    application.add_handler(CommandHandler("delcache", cache.delcache_command))
-    application.add_handler(CommandHandler("showcache", cache.showcache_command))
-
-    # 查询添加黑名单, 参数 uid
-    application.add_handler(CommandHandler("blacklist_add", blacklist.handle_blacklist_add_command))
-    application.add_handler(CommandHandler("blacklist_remove", blacklist.handle_blacklist_remove_command))
-    application.add_handler(CommandHandler("blacklist_show", blacklist.handle_blacklist_show_command))
-
-    application.add_handler(CommandHandler("notify", notify.notify_cmd))
+    for name, callback in _COMMAND_HANDLERS:
+        application.add_handler(CommandHandler(name, callback))
     application.add_handler(CallbackQueryHandler(notify.notify_cb, pattern=r"^notify:"))
 
-    application.add_handler(CommandHandler("status", status.handle_status_command))
-
-    # 暂时以下这些命令未开放使用,先放着看后续是否有需求
-    application.add_handler(CommandHandler("bilibili", bilibili.bilibili_command))
-    application.add_handler(CommandHandler("douyin", douyin.douyin_command))
-    application.add_handler(CommandHandler("music", music.music_command))
-    application.add_handler(CommandHandler("xhs", xiaohongshu.xhs_command))
-    application.add_handler(CommandHandler("tiktok", tiktok.tiktok_command))
-
     application.add_handler(MessageHandler(filters.ALL, general.handle_general_url))
 
     # 运行
@@ -83,11 +109,6 @@ def main() -> None:
     # await application.wait_closed()
 
 
-# 默认 /start
-async def _start(update, ctx):
-    await update.message.reply_text("欢迎！直接发送视频链接开始下载。")
-
-
 if __name__ == "__main__":
     try:
         main()
@@ -1,4 +1,6 @@
 # src/TelegramBot/cleaner.py
+import heapq
+import os
 from pathlib import Path
 import time, logging, datetime
 
@@ -7,48 +9,57 @@ logger = logging.getLogger(__name__)
 MAX_DIR_BYTES = 300 * 1024 * 1024  # 300 MB
 
 
+_SIZE_UNITS = ("B", "KB", "MB", "GB", "TB", "PB")
+
+
 def _fmt_size(bytes_: int) -> str:
-    for unit in ("B", "KB", "MB", "GB", "TB"):
-        if bytes_ < 1024:
-            return f"{bytes_:.2f} {unit}"
-        bytes_ /= 1024
-    return f"{bytes_:.2f} PB"
+    # bit_length 直接算出 1024 的幂次，免去逐级除法
+    idx = min((max(int(bytes_), 1).bit_length() - 1) // 10, len(_SIZE_UNITS) - 1)
+    return f"{bytes_ / (1 << (idx * 10)):.2f} {_SIZE_UNITS[idx]}"
 
 
 def _fmt_ctime(ts: float) -> str:
     return datetime.datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M")
 
 
-def purge_old_files(folder: Path, max_dir_mb: float, lower_limit: float) -> float:
+def purge_old_files(folder: str | Path, max_dir_mb: float, lower_limit: float) -> float:
     """
     超出 max_dir_mb 时，从最旧文件开始删，直到目录大小 ≤ 阈值。
     返回清理的空间大小（MB）。
     """
-    if not folder.exists() or not folder.is_dir():
+    folder = os.fspath(folder)
+    if not os.path.isdir(folder):
         logger.warning("目录不存在或不是文件夹，跳过清理：%s", folder)
         return 0.0
 
-    # 列出待清理文件（排除 .part 临时文件）
-    files = [f for f in folder.iterdir() if f.is_file() and f.suffix != ".part"]
-    total_mb = sum(f.stat().st_size for f in files) / 1024 ** 2
+    # 单次 scandir 列出待清理文件（排除 .part 临时文件），stat 结果缓存下来供求和、排序、删除复用
+    with os.scandir(folder) as it:
+        # DirEntry 的 is_file/stat 在多数文件系统上直接复用目录项信息，不额外发起系统调用
+        # (mtime, size, path, name)：元组首项即排序键，可直接建堆
+        entries = [(st.st_mtime, st.st_size, e.path, e.name)
+                   for e in it if e.is_file(follow_symlinks=False) and not e.name.endswith(".part")
+                   for st in (e.stat(follow_symlinks=False),)]
+    total = sum(size for _, size, _, _ in entries)
+    total_mb = total / 1024 ** 2
     if total_mb <= max_dir_mb:
         return 0.0  # 未超阈值，无需清理
 
-    # 按修改时间升序（最旧的先删）
-    files.sort(key=lambda f: f.stat().st_mtime)
+    # 小顶堆按修改时间逐个弹出最旧文件；通常只删少量文件，无需整体排序
+    heapq.heapify(entries)
     logger.warning("目录占用 %.1f MB，开始按最旧顺序清理至 %.1f MB", total_mb, lower_limit)
 
-    freed_mb = 0.0
-    for f in files:
-        size_mb = f.stat().st_size / 1024 ** 2
+    lower_bytes = lower_limit * 1024 ** 2
+    freed = 0
+    while entries:
+        _, size, path, name = heapq.heappop(entries)
         try:
-            f.unlink()
-            freed_mb += size_mb
-            logger.warning(" 删除旧文件 -> %s (%.2f MB)", f.name, size_mb)
+            os.unlink(path)
+            freed += size
+            logger.warning(" 删除旧文件 -> %s (%.2f MB)", name, size / 1024 ** 2)
         except Exception as e:
-            logger.error("删除 %s 失败: %s", f, e)
-        total_mb -= size_mb
-        if total_mb <= lower_limit:
+            logger.error("删除 %s 失败: %s", path, e)
+        total -= size
+        if total <= lower_bytes:
             break
 
-    return freed_mb
+    return freed / 1024 ** 2
@@ -20,7 +20,7 @@ PROXY_SWITCH = 'Win' in os_name  # 代理开关
 # —————————— TelegramBot配置 ——————————
 MIN_MSG_INTERVAL = 3.0  # 2 秒只能发一次，速率限制
 TELEGRAM_TOKEN_ENV = os.getenv('TELEGRAM_TOKEN', '')
-log.debug(f"TELEGRAM_TOKEN={TELEGRAM_TOKEN_ENV[:10]}*********")
+log.debug("TELEGRAM_TOKEN=%s*********", TELEGRAM_TOKEN_ENV[:10])
 ADMIN_ID = 6040522700  # 管理员 TG ID
 ALLOWED_USERS = {ADMIN_ID}  # 白名单用户，可扩展为数据库
 GENERIC_HANDLER_UPLOAD_TIMEOUT = [35, 2]  # 主流程中上传超时
@@ -48,7 +48,6 @@ PROMPT_WORD = "总结内容,罗列清晰,不要回复其余无关话术,内容
 
 DOWNLOAD_TIMEOUT = 20  # 多线程下载超时 时间
 DOUYIN_DOWNLOAD_THREADS = 8  # 抖音下载线程
-DOUYIN_SESSION_COUNTS = 3  # 多线程下载时session池数量
 DOUYIN_SAVE_DIR = BASE_DIR / "dy_downloads"
 # 超时 设置
 DOUYIN_FETCH_IMAGE_TIMEOUT = 40  # 下载图集
@@ -78,7 +77,7 @@ TIKTOK_OVER_SIZE = "⚠️注意：视频体积超50M无法上传, 请选择下
 BILI_SAVE_DIR = BASE_DIR / "bili_downloads"  # 保存路径
 DEFAULT_DOWNLOAD_THREADS = 8  # 默认线程
 BILI_COOKIE = {'SESSDATA': os.getenv('SESSDATA', '')}
-log.debug(f"SESSDATA={BILI_COOKIE['SESSDATA'][:10]}*********")
+log.debug("SESSDATA=%s*********", BILI_COOKIE['SESSDATA'][:10])
 BILI_PREVIEW_VIDEO_TITLE = "⚠️注意：该视频为私人视频或会员视频,仅提供预览片段"
 
 # —————————— B站配置 ——————————
@@ -86,7 +85,7 @@ BILI_PREVIEW_VIDEO_TITLE = "⚠️注意：该视频为私人视频或会员视
 # —————————— 小红书 ——————————
 XIAOHONGSHU_SAVE_DIR = BASE_DIR / "xhs_downloads"
 XIAOHONGSHU_COOKIE = {'web_session': os.getenv('WEB_SESSION', '')}
-log.debug(f"web_session={XIAOHONGSHU_COOKIE['web_session'][:10]}*********")
+log.debug("web_session=%s*********", XIAOHONGSHU_COOKIE['web_session'][:10])
 XIAOHONGSHU_OVER_SIZE = "⚠️注意：视频体积超过50M无法发送"
 # —————————— 小红书 ——————————
 
@@ -1,23 +1,42 @@
 # TelegramBot/file_cache.py
 """
 把 <key, file_id> 存到磁盘 (JSON)，Bot 重启后仍可秒回。
-默认存到 TelegramBot/file_id_cache.json
+默认存到 TelegramBot/file_id_cache.json（快照），
+日常修改以 JSON Lines 追加到 file_id_cache.log（增量日志），日志过大时再压实成快照。
 """
-import json
 import atexit
 import logging
 from pathlib import Path
 import tempfile
+import threading
 import os
 from typing import Union, List, Dict, Any
 
+from PublicMethods.tools import json_dumps, json_loads
+
 logger = logging.getLogger(__name__)
 
 CACHE_FILE = Path(__file__).with_name("file_id_cache.json")
+LOG_FILE = CACHE_FILE.with_suffix(".log")
+COMPACT_RATIO = 4  # 日志大小超过快照的倍数时压实
+COMPACT_MIN_BYTES = 64 * 1024  # 快照很小时避免频繁压实
 
 _cache: Dict[str, Dict[str, Any]] = {}
 _DEFAULT_TITLE = ""
 
+FLUSH_DEBOUNCE_S = 0.2  # 最后一次修改后延迟落盘，连续 put/delete 合并为一次写入
+_lock = threading.Lock()  # 保护 _cache 修改与序列化快照
+_write_lock = threading.Lock()  # 串行化落盘，保证后生成的快照后写入
+_dirty = False
+_flush_timer: threading.Timer | None = None
+_pending: Dict[str, Dict[str, Any] | None] = {}  # 待追加到日志的修改，None 表示删除
+
+# 日志追加不 fsync，由定期 checkpoint 补做；崩溃时最多丢失最近 CHECKPOINT_INTERVAL_S 秒内的 put，
+# file_id 丢了只会让 Telegram 重新上传一次，可以接受
+CHECKPOINT_INTERVAL_S = 30
+_unsynced = False  # 上次 fsync 之后是否有过未同步的写入
+_checkpoint_timer: threading.Timer | None = None
+
 
 # ───────────────────────── 内部辅助 ──────────────────────────
 def _normalize_entry(raw: Any) -> Dict[str, Any]:
@@ -42,28 +61,70 @@ def _normalize_entry(raw: Any) -> Dict[str, Any]:
 
 
 # ───────────────────────── I/O ──────────────────────────
+def _replay_log(cache: Dict[str, Dict[str, Any]]) -> int:
+    """
+    按顺序重放增量日志到 cache，返回重放的记录数。
+    末尾写了一半的行（无换行或解析失败）直接忽略，并把日志截断到最后一条完整记录之后，
+    否则后续以追加方式写入的记录会拼在残行后面，下次加载时一并丢失。
+    """
+    if not LOG_FILE.exists():
+        return 0
+    count = 0
+    good_end = 0  # 最后一条完整记录之后的字节偏移
+    torn = False
+    with LOG_FILE.open("rb") as f:
+        for line in f:
+            try:
+                if not line.endswith(b"\n"):
+                    raise ValueError("incomplete record")
+                rec = json_loads(line)
+            except ValueError:
+                torn = True
+                break
+            if rec.get("op") == "put":
+                cache[rec["k"]] = _normalize_entry(rec["v"])
+            else:
+                cache.pop(rec["k"], None)
+            count += 1
+            good_end += len(line)
+    if torn:
+        logger.warning("增量日志存在损坏记录，忽略其后内容并截断到 %s 字节: %s", good_end, LOG_FILE)
+        os.truncate(LOG_FILE, good_end)
+    return count
+
+
 def load() -> None:
     global _cache
-    if CACHE_FILE.exists():
-        try:
-            raw_cache = json.loads(CACHE_FILE.read_text("utf-8"))
+    cache: Dict[str, Dict[str, Any]] = {}
+    try:
+        if CACHE_FILE.exists():
+            # 按 bytes 读入交给 json_loads：装了 orjson 时直接解析字节，不再额外生成一份 str 拷贝
+            raw_cache = json_loads(CACHE_FILE.read_bytes())
             if not isinstance(raw_cache, dict):
                 raise ValueError("cache file root must be dict")
-            _cache = {k: _normalize_entry(v) for k, v in raw_cache.items()}
-        except Exception:
-            logger.error("加载缓存失败，使用空缓存。", exc_info=True)
-            _cache = {}
+            # dict.fromkeys 按源 dict 大小一次性分配哈希表，逐项回填时不再扩容
+            cache = dict.fromkeys(raw_cache)
+            for k, v in raw_cache.items():
+                cache[k] = _normalize_entry(v)
+        replayed = _replay_log(cache)
+        if replayed:
+            logger.debug("replay cache log, records:%s", replayed)
+        _cache = cache
+    except Exception:
+        logger.error("加载缓存失败，使用空缓存。", exc_info=True)
+        _cache = {}
 
 
-def _atomic_write(data: str) -> Path:
-    """原子性写入，防止写坏文件。"""
+def _atomic_write(data: bytes, fsync: bool = False) -> Path:
+    """原子性写入，防止写坏文件。fsync=True 时在替换前把数据刷到磁盘。"""
     dir_ = CACHE_FILE.parent
     with tempfile.NamedTemporaryFile(
-            mode="w", encoding="utf-8", dir=dir_, delete=False
+            mode="wb", dir=dir_, delete=False
     ) as tf:
         tf.write(data)
         tf.flush()
-        os.fsync(tf.fileno())
+        if fsync:
+            os.fsync(tf.fileno())
         tmp_path = Path(tf.name)
     os.replace(str(tmp_path), str(CACHE_FILE))
     logger.debug(f"cache wright success")
@@ -72,11 +133,21 @@ def _atomic_write(data: str) -> Path:
 
 def save() -> None:
     """
+    压实：把完整缓存写成新快照并清空增量日志。
     先写入到同目录下的临时文件，写入成功后再用 os.replace 原子替换旧文件。
+    快照替换后才删日志，中途崩溃时日志会在旧/新快照上重放，结果一致。
     """
+    global _dirty, _unsynced
     tmp_path: Path | None = None
     try:
-        tmp_path = _atomic_write(json.dumps(_cache, ensure_ascii=False, indent=2))
+        with _write_lock:
+            with _lock:
+                _dirty = False
+                _pending.clear()
+                data = json_dumps(_cache, indent=True)
+            tmp_path = _atomic_write(data, fsync=True)
+            LOG_FILE.unlink(missing_ok=True)
+            _unsynced = False
         logger.info("save cache success.")
     except Exception:
         logger.error("保存缓存失败，保留旧文件不变。", exc_info=True)
@@ -87,6 +158,90 @@ def save() -> None:
                 pass
 
 
+def _needs_compact() -> bool:
+    """日志超过快照 COMPACT_RATIO 倍（且不小于 COMPACT_MIN_BYTES）时需要压实。"""
+    try:
+        log_size = LOG_FILE.stat().st_size
+    except FileNotFoundError:
+        return False
+    try:
+        snapshot_size = CACHE_FILE.stat().st_size
+    except FileNotFoundError:
+        snapshot_size = 0
+    return log_size > max(COMPACT_RATIO * snapshot_size, COMPACT_MIN_BYTES)
+
+
+def _arm_checkpoint() -> None:
+    """有未同步写入时确保 CHECKPOINT_INTERVAL_S 后执行一次 checkpoint；已在计时则不重复启动。"""
+    global _checkpoint_timer
+    if _checkpoint_timer is not None and _checkpoint_timer.is_alive():
+        return
+    _checkpoint_timer = threading.Timer(CHECKPOINT_INTERVAL_S, _checkpoint)
+    _checkpoint_timer.daemon = True
+    _checkpoint_timer.start()
+
+
+def _checkpoint() -> None:
+    """写掉待落盘的修改并 fsync 增量日志；由定时器和退出钩子调用。"""
+    global _unsynced
+    _flush()
+    with _write_lock:
+        if not _unsynced:
+            return
+        try:
+            fd = os.open(LOG_FILE, os.O_RDONLY)
+        except FileNotFoundError:
+            _unsynced = False
+            return
+        try:
+            os.fsync(fd)
+            _unsynced = False
+        finally:
+            os.close(fd)
+
+
+def _flush() -> None:
+    """把防抖期间累积的修改追加到增量日志，只写变化的条目；日志过大时压实成快照。"""
+    global _dirty, _unsynced
+    if not _dirty:
+        return
+    try:
+        with _write_lock:
+            with _lock:
+                _dirty = False
+                pending = dict(_pending)
+                _pending.clear()
+            if not pending:
+                return
+            lines = b"".join(
+                json_dumps({"op": "put", "k": k, "v": v} if v is not None else {"op": "del", "k": k}) + b"\n"
+                for k, v in pending.items()
+            )
+            with LOG_FILE.open("ab") as f:
+                f.write(lines)
+            _unsynced = True
+            _arm_checkpoint()
+        logger.debug("append cache log, records:%s", len(pending))
+    except Exception:
+        logger.error("写入缓存增量日志失败，改为整体保存。", exc_info=True)
+        save()
+        return
+    if _needs_compact():
+        save()
+
+
+def _schedule_flush() -> None:
+    """标记脏并重置防抖定时器，FLUSH_DEBOUNCE_S 内无新修改才真正写盘。"""
+    global _dirty, _flush_timer
+    with _lock:
+        _dirty = True
+        if _flush_timer is not None:
+            _flush_timer.cancel()
+        _flush_timer = threading.Timer(FLUSH_DEBOUNCE_S, _flush)
+        _flush_timer.daemon = True
+        _flush_timer.start()
+
+
 # ───────────────────────── 公共 API ──────────────────────────
 def get(key: str) -> Union[str, List[str], None]:
     """
@@ -116,17 +271,25 @@ def keys() -> List[str]:
 
 def put(key, file_id, *, title: str | None = None, reply: list | None = None, parse_mode: str | None = None,
         special: str = "normal") -> None:
-    entry = _cache.setdefault(key, _normalize_entry({}))
-    entry.update(
-        value=file_id,
-        reply=reply if reply is not None else entry.get("reply"),
-        parse_mode=parse_mode if parse_mode is not None else entry.get("parse_mode"),
-        special=special,
-    )
+    with _lock:
+        old = _cache.get(key)
+        entry = dict(old) if old is not None else _normalize_entry({})
+        entry.update(
+            value=file_id,
+            reply=reply if reply is not None else entry.get("reply"),
+            parse_mode=parse_mode if parse_mode is not None else entry.get("parse_mode"),
+            special=special,
+        )
+        if title is not None:
+            entry["title"] = title
+        if entry == old:
+            # 重复写入同一条目时不标脏，省掉一次落盘
+            logger.debug(f"put cache unchanged, key:{key}")
+            return
+        _cache[key] = entry
+        _pending[key] = entry
     logger.debug(f"put cache, key:{key}")
-    if title is not None:
-        entry["title"] = title
-    save()
+    _schedule_flush()
 
 
 def delete(key: str) -> bool:
@@ -134,9 +297,12 @@ def delete(key: str) -> bool:
     删除指定 key 的缓存条目。
     返回 True 表示删除成功，False 表示 key 不存在。
     """
-    if key in _cache:
-        _cache.pop(key, None)
-        save()  # 立即持久化
+    with _lock:
+        found = _cache.pop(key, None) is not None
+        if found:
+            _pending[key] = None
+    if found:
+        _schedule_flush()
         logger.info("delete cache success: %s", key)
         return True
     logger.warning("delete cache failed, key not found: %s", key)
@@ -162,4 +328,4 @@ def key_title_pairs() -> list[tuple[str, str]]:
 
 # ───────────────────────── 启动 & 退出挂钩 ──────────────────────────
 load()
-atexit.register(save)
+atexit.register(_checkpoint)  # 退出前把防抖中尚未落盘的修改追加到日志并 fsync
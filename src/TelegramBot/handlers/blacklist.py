@@ -3,16 +3,39 @@ from telegram import Update
 from telegram.ext import ContextTypes
 from TelegramBot.config import ADMIN_ID
 from TelegramBot.recorder_blacklist import load_blacklist, save_blacklist
-from TelegramBot.recorder_parse import load_users
+from TelegramBot.recorder_parse import load_users, STATS_FILE
 
 import logging
 
 log = logging.getLogger(__name__)
 
+# 用户表缓存：按统计文件 mtime 失效，避免每条管理命令都重新解析整个文件并重建索引
+_users_cache: dict[int, dict] | None = None
+_users_mtime: float = 0
+_uname2cid: dict[str, int] = {}
+
+
+def _get_users() -> dict[int, dict]:
+    global _users_cache, _users_mtime, _uname2cid
+    try:
+        mtime = STATS_FILE.stat().st_mtime
+    except FileNotFoundError:
+        mtime = 0
+    if _users_cache is None or mtime != _users_mtime:
+        _users_cache = load_users()
+        _uname2cid = {v.get("uname"): k for k, v in _users_cache.items() if v.get("uname")}
+        _users_mtime = mtime
+    return _users_cache
+
+
+def _get_uname2cid() -> dict[str, int]:
+    _get_users()
+    return _uname2cid
+
 
 # 公共工具：解析参数 → chat_id
 def _token_to_cid(token: str, uname2cid: dict[str, int]) -> int | None:
-    token = token.lstrip("@").strip()
+    token = token.strip().removeprefix("@")  # 只去掉一个前导 @，"@@name" 不会被当成 "name"
     if token.isdigit():
         return int(token)
     return uname2cid.get(token)
@@ -27,9 +50,8 @@ async def handle_blacklist_add_command(update: Update, context: ContextTypes.DEF
         return await update.message.reply_text("用法：/blacklist_add <chat_id|@username> ...",
                                                reply_to_message_id=update.message.message_id)
 
-    blacklist: list[int] = load_blacklist()
-    users = load_users()
-    uname2cid = {v.get("uname"): int(k) for k, v in users.items() if v.get("uname")}
+    blacklist: set[int] = set(load_blacklist())
+    uname2cid = _get_uname2cid()
 
     added, already, unknown = [], [], []
 
@@ -40,10 +62,10 @@ async def handle_blacklist_add_command(update: Update, context: ContextTypes.DEF
         if cid in blacklist:
             already.append(cid)
         else:
-            blacklist.append(cid); added.append(cid); log.info(f"加入黑名单: {cid}")
+            blacklist.add(cid); added.append(cid); log.info(f"加入黑名单: {cid}")
 
     if added:
-        save_blacklist(sorted(set(blacklist)))
+        save_blacklist(sorted(blacklist))
 
     parts = []
     if added:   parts.append(f"✅ 已加入: {', '.join(map(str, added))}")
@@ -61,9 +83,8 @@ async def handle_blacklist_remove_command(update: Update, context: ContextTypes.
         return await update.message.reply_text("用法：/blacklist_remove <chat_id|@username> ...",
                                                reply_to_message_id=update.message.message_id)
 
-    blacklist: list[int] = load_blacklist()
-    users = load_users()
-    uname2cid = {v.get("uname"): int(k) for k, v in users.items() if v.get("uname")}
+    blacklist: set[int] = set(load_blacklist())
+    uname2cid = _get_uname2cid()
 
     removed, not_in, unknown = [], [], []
 
@@ -72,12 +93,12 @@ async def handle_blacklist_remove_command(update: Update, context: ContextTypes.
         if cid is None:
             unknown.append(token); continue
         if cid in blacklist:
-            blacklist.remove(cid); removed.append(cid); log.info(f"移除黑名单: {cid}")
+            blacklist.discard(cid); removed.append(cid); log.info(f"移除黑名单: {cid}")
         else:
             not_in.append(cid)
 
     if removed:
-        save_blacklist(sorted(set(blacklist)))
+        save_blacklist(sorted(blacklist))
 
     parts = []
     if removed: parts.append(f"✅ 已移除: {', '.join(map(str, removed))}")
@@ -95,7 +116,7 @@ async def handle_blacklist_show_command(update: Update, context: ContextTypes.DE
     if not blacklist:
         return await update.message.reply_text("当前黑名单为空")
 
-    users = load_users()
+    users = _get_users()
     uname2info = {int(k): (v.get("uname", ""), v.get("full_name", "")) for k, v in users.items()}
 
     lines = []
@@ -2,6 +2,7 @@
 import asyncio
 import logging
 import time
+from contextlib import ExitStack
 from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import List, Union
@@ -27,6 +28,44 @@ task_manager = TaskManager()
 
 logger = logging.getLogger(__name__)
 
+# 下载目录清理：同一目录最多每 PURGE_INTERVAL_S 秒扫描一次，且放到线程池里后台执行，不占用户请求的时间
+PURGE_INTERVAL_S = 600
+_PURGE_LIMITS = {  # 平台 -> (目录上限 MB, 清理到 MB)
+    'douyin': (200, 50),
+    'bilibili': (200, 50),
+    'xhs': (200, 50),
+    'music': (100, 20),
+}
+_last_purge: dict[Path, float] = {}
+_purge_tasks: set[asyncio.Task] = set()  # 持有后台任务引用，防止被 GC 提前回收
+
+
+async def _purge_and_notify(bot, save_dir: Path, max_dir_mb: float, lower_limit: float):
+    """在线程池中清理目录，有删除时再通知管理员。"""
+    try:
+        loop = asyncio.get_running_loop()
+        deleted_size = await loop.run_in_executor(executor, purge_old_files, save_dir, max_dir_mb, lower_limit)
+        if deleted_size:
+            await bot.send_message(
+                ADMIN_ID,
+                text=f"已清除目录下 {save_dir}\n缓存文件：{deleted_size:.2f} MB",
+                disable_web_page_preview=True,
+            )
+    except Exception as e:
+        logger.error("后台清理目录 %s 失败: %s", save_dir, e)
+
+
+def _schedule_purge(bot, save_dir: Path, platform_name: str):
+    now = time.monotonic()
+    if now - _last_purge.get(save_dir, float("-inf")) < PURGE_INTERVAL_S:
+        return
+    _last_purge[save_dir] = now
+    task = asyncio.get_running_loop().create_task(
+        _purge_and_notify(bot, save_dir, *_PURGE_LIMITS.get(platform_name, (300, 0)))
+    )
+    _purge_tasks.add(task)
+    task.add_done_callback(_purge_tasks.discard)
+
 
 async def generic_command_handler(
         update: Update,
@@ -56,24 +95,8 @@ async def generic_command_handler(
     record.full_name = (update.effective_user.last_name or '') + (update.effective_user.first_name or '')
 
     if save_dir:
-        # 清本地缓存并汇报
-        clear = [300, 0]
-        if platform_name == 'douyin':
-            clear = [200, 50]
-        elif platform_name == 'bilibili':
-            clear = [200, 50]
-        elif platform_name == 'xhs':
-            clear = [200, 50]
-        elif platform_name == 'music':
-            clear = [100, 20]
-
-        deleted_size = purge_old_files(save_dir, *clear)
-        if deleted_size:
-            await context.bot.send_message(
-                ADMIN_ID,
-                text=f"已清除目录下 {save_dir}\n缓存文件：{deleted_size:.2f} MB",
-                disable_web_page_preview=True,
-            )
+        # 清本地缓存并汇报（节流 + 后台执行）
+        _schedule_purge(context.bot, save_dir, platform_name)
 
     # 速率和任务限制 (通用)
     if not rate_limiter.allow(uid):
@@ -443,79 +466,83 @@ async def _upload_and_send(sender: MsgSender, result: ParseResult, progress_msg:
 
         # 用于构建发送给 Telegram API 的媒体列表
         media_group_items: List[Union[InputMediaPhoto, InputMediaVideo]] = []
-        # 用于妥善管理文件句柄，防止资源泄漏
-        file_handles = []
-
         try:
-            # 迭代每一个媒体项，而不是使用列表推导式
-            for i, item in enumerate(result.media_items):
-                # 为每个文件打开一个句柄，并记录下来以便后续关闭
-                f = Path(item.local_path).open('rb')
-                file_handles.append(f)
-
-                # 只有媒体集中的第一个项目才附带标题
-                base_caption = result.title if i == 0 else None
-                # 如果是首个视频且有背景音乐链接，就在标题下方加上“背景乐下载”超链接
-                if i == 0 and getattr(result, 'audio_uri', None):
-                    # 使用 HTML 格式：<a href="链接">文本</a>
-                    music_link = f'<b>🎧<a href="{result.audio_uri}">下载背景乐 {result.audio_title}</a></b>'
-                    # 如果已经有标题，就换行追加；否则直接使用链接
-                    caption_text = f"{base_caption}\n\n{music_link}" if base_caption else music_link
-                else:
-                    caption_text = base_caption
-                if caption_text:
-                    caption_text += f"\n\n{LESS_FLAG}"
-                result.html_title = caption_text
-                # 【核心逻辑】根据 media_items 中的 file_type 判断是创建视频还是图片对象
-                if item.file_type == 'video':
-                    # 如果是视频，创建 InputMediaVideo
-                    media_group_items.append(
-                        InputMediaVideo(
-                            media=f,
-                            caption=caption_text,
-                            parse_mode=ParseMode.HTML,
-                            width=item.width,
-                            height=item.height,
-                            duration=item.duration,
-                            supports_streaming=True,
+            # ExitStack 统一管理文件句柄：无论发送成功还是中途异常，退出时都会全部关闭
+            with ExitStack() as stack:
+                # 在线程池中并发打开所有文件，避免在事件循环线程里串行执行 open
+                loop = asyncio.get_running_loop()
+                opened = await asyncio.gather(
+                    *(loop.run_in_executor(executor, open, item.local_path, 'rb') for item in result.media_items),
+                    return_exceptions=True,
+                )
+                file_handles = [f for f in opened if not isinstance(f, BaseException)]
+                stack.callback(logger.debug, "已关闭 %d 个媒体文件句柄。", len(file_handles))
+                for f in file_handles:
+                    stack.enter_context(f)
+                for f in opened:
+                    if isinstance(f, BaseException):
+                        raise f
+
+                # 迭代每一个媒体项，而不是使用列表推导式
+                for i, (item, f) in enumerate(zip(result.media_items, file_handles)):
+                    # 只有媒体集中的第一个项目才附带标题
+                    base_caption = result.title if i == 0 else None
+                    # 如果是首个视频且有背景音乐链接，就在标题下方加上“背景乐下载”超链接
+                    if i == 0 and getattr(result, 'audio_uri', None):
+                        # 使用 HTML 格式：<a href="链接">文本</a>
+                        music_link = f'<b>🎧<a href="{result.audio_uri}">下载背景乐 {result.audio_title}</a></b>'
+                        # 如果已经有标题，就换行追加；否则直接使用链接
+                        caption_text = f"{base_caption}\n\n{music_link}" if base_caption else music_link
+                    else:
+                        caption_text = base_caption
+                    if caption_text:
+                        caption_text += f"\n\n{LESS_FLAG}"
+                    result.html_title = caption_text
+                    # 【核心逻辑】根据 media_items 中的 file_type 判断是创建视频还是图片对象
+                    if item.file_type == 'video':
+                        # 如果是视频，创建 InputMediaVideo
+                        media_group_items.append(
+                            InputMediaVideo(
+                                media=f,
+                                caption=caption_text,
+                                parse_mode=ParseMode.HTML,
+                                width=item.width,
+                                height=item.height,
+                                duration=item.duration,
+                                supports_streaming=True,
+                            )
                         )
-                    )
-                    logger.debug(f"向媒体集添加视频: {item.local_path}")
-                else:
-                    # 否则，默认作为图片处理，创建 InputMediaPhoto
-                    media_group_items.append(
-                        InputMediaPhoto(
-                            media=f,
-                            caption=caption_text,
-                            parse_mode=ParseMode.HTML,
+                        logger.debug(f"向媒体集添加视频: {item.local_path}")
+                    else:
+                        # 否则，默认作为图片处理，创建 InputMediaPhoto
+                        media_group_items.append(
+                            InputMediaPhoto(
+                                media=f,
+                                caption=caption_text,
+                                parse_mode=ParseMode.HTML,
+                            )
                         )
+                        logger.debug(f"向媒体集添加图片: {item.local_path}")
+
+                # 调用 sender 的 send_media_group 方法发送构建好的混合媒体列表
+                # progress_msg 会在 sender.send_media_group 内部被处理
+                # 将 media_group_items 列表每次分批（最多 10 个）发送，
+                await progress_msg.edit_text(f"图片上传中... (共 {len(media_group_items)} 张)")
+                all_results = []
+                # 按步长 10 切片
+                for i in range(0, len(media_group_items), 10):
+                    chunk = media_group_items[i: i + 10]
+                    logger.debug(f"分片发送开始：第 {i // 10 + 1} 组，共 {len(chunk)} 个媒体（索引 {i}–{i + len(chunk) - 1}）")
+                    result = await sender.send_media_group(
+                        media=chunk,
+                        progress_msg=progress_msg,
+                        parse_mode=ParseMode.HTML,
                     )
-                    logger.debug(f"向媒体集添加图片: {item.local_path}")
-
-            # 调用 sender 的 send_media_group 方法发送构建好的混合媒体列表
-            # progress_msg 会在 sender.send_media_group 内部被处理
-            # 将 media_group_items 列表每次分批（最多 10 个）发送，
-            await progress_msg.edit_text(f"图片上传中... (共 {len(media_group_items)} 张)")
-            all_results = []
-            # 按步长 10 切片
-            for i in range(0, len(media_group_items), 10):
-                chunk = media_group_items[i: i + 10]
-                logger.debug(f"分片发送开始：第 {i // 10 + 1} 组，共 {len(chunk)} 个媒体（索引 {i}–{i + len(chunk) - 1}）")
-                result = await sender.send_media_group(
-                    media=chunk,
-                    progress_msg=progress_msg,
-                    parse_mode=ParseMode.HTML,
-                )
-                all_results.extend(result)
-            logger.debug("所有分片发送完毕，共发送媒体组 %d 组。", (len(media_group_items) + 9) // 10)
-            return all_results
+                    all_results.extend(result)
+                logger.debug("所有分片发送完毕，共发送媒体组 %d 组。", (len(media_group_items) + 9) // 10)
+                return all_results
         except Exception as e:
             raise Exception(f"发送媒体组时发生未知错误: {e}")
-        finally:
-            # 使用 finally 确保无论发送成功与否，所有打开的文件句柄都被关闭
-            for f in file_handles:
-                f.close()
-            logger.debug(f"已关闭 {len(file_handles)} 个媒体文件句柄。")
 
     else:
         await progress_msg.edit_text("无法处理的媒体类型或没有媒体文件。")
@@ -11,6 +11,8 @@ from TikTokDownload.models import TikTokVideoOption
 
 logger = logging.getLogger(__name__)
 
+_UNSAFE_FILENAME_TABLE = str.maketrans("", "", r'\/:*?"<>|')  # translate 时直接删除这些字符
+
 # 定义内容类型，便于通用处理器判断如何发送
 ContentType = Literal["video", "audio", "image_gallery", "link", "unknown"]
 
@@ -118,4 +120,4 @@ class BaseParser(ABC):
 
     def _safe_filename(self, name: str) -> str:
         """提供一个通用的安全文件名方法。"""
-        return "".join(c for c in name if c not in r'\/:*?"<>|').strip()
+        return name.translate(_UNSAFE_FILENAME_TABLE).strip()
@@ -17,7 +17,6 @@ from cryptography.hazmat.primitives.keywrap import aes_key_wrap
 from telegram.helpers import escape_markdown
 
 from BilibiliDownload.bilibili_post import BilibiliPost
-from PublicMethods.gemini import gemini
 from PublicMethods.tools import check_file_size
 from TelegramBot.config import BILI_SAVE_DIR, BILI_COOKIE, PROMPT_WORD
 from .base import BaseParser, ParseResult
@@ -27,11 +26,11 @@ from TelegramBot.uploader import upload
 logger = logging.getLogger(__name__)
 
 INVALID = r'\\/:*?"<>|'
+_INVALID_TABLE = str.maketrans(dict.fromkeys(INVALID, "_"))  # 非法字符 → "_"，translate 一次遍历完成替换
 
 
 def _safe_filename(name: str, max_len: int = 80) -> str:
-    safe = "".join("_" if c in INVALID else c for c in name).strip()
-    return safe[:max_len]
+    return name.translate(_INVALID_TABLE).strip()[:max_len]
 
 
 class BilibiliParser(BaseParser):
@@ -75,6 +74,8 @@ class BilibiliParser(BaseParser):
         if not self.post.ocr_content:
             return ''
         try:
+            # 延迟导入：只有真正需要 AI 总结时才加载 google.genai 并创建客户端
+            from PublicMethods.gemini import gemini
             gemini.reset()
             gemini.add_text(f"{PROMPT_WORD}\n内容:{self.post.ocr_content}")
             r = gemini.generate()
@@ -1,11 +1,12 @@
 # TelegramBot/parsers/douyin_parser.py
+import asyncio
 import logging
+from dataclasses import asdict
 from pathlib import Path
 from typing import Any, Coroutine
 
 from DouyinDownload.douyin_post import DouyinPost
 from DouyinDownload.douyin_image_post import DouyinImagePost
-from PublicMethods.gemini import gemini
 from TelegramBot.config import DOWNLOAD_TIMEOUT, PREVIEW_SIZE, EXCLUDE_RESOLUTION, DOUYIN_PARSE_IMAGE_TIMEOUT, \
     DOUYIN_PARSE_VIDEO_TIMEOUT, PROMPT_WORD
 from .base import BaseParser, ParseResult, VideoQualityOption
@@ -25,7 +26,8 @@ class DouyinParser(BaseParser):
     async def peek(self) -> tuple[str, str]:
         vid, title = None, None
         self.post = DouyinPost(self.url)
-        self.content_type = self.post.get_content_type(self.post.short_url)
+        # HEAD 重定向链是同步请求，放到线程里执行，避免阻塞事件循环
+        self.content_type = await asyncio.to_thread(self.post.get_content_type, self.post.short_url)
         if self.content_type == 'image':
             self.image_post = DouyinImagePost(self.post.short_url)
             await self.image_post.fetch_details()
@@ -74,6 +76,8 @@ class DouyinParser(BaseParser):
         if not self.post.ocr_content:
             return ''
         try:
+            # 延迟导入：只有真正需要 AI 总结时才加载 google.genai 并创建客户端
+            from PublicMethods.gemini import gemini
             gemini.reset()
             gemini.add_text(f"{PROMPT_WORD}\n内容:{self.post.ocr_content}")
             r = gemini.generate()
@@ -106,7 +110,7 @@ class DouyinParser(BaseParser):
             if opt.size_mb:
                 name += f" ({opt.size_mb:.1f}MB)"
             # 1. 拷贝所有属性
-            params = opt.__dict__.copy()
+            params = asdict(opt)
 
             # 2. 覆盖/新增关键字段
             params.update({
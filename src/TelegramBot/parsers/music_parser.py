@@ -3,11 +3,12 @@
 
 抽离旧版 `music.py` 中的下载/缓存逻辑，统一为 `BaseParser` 接口。
 """
+import asyncio
 import logging
 from pathlib import Path
 
 from MusicDownload.download import download_single
-from MusicDownload.download_music import get_download_link
+from MusicDownload.download_music import aget_download_link
 from TelegramBot.config import MUSIC_SAVE_DIR
 from .base import BaseParser, ParseResult
 
@@ -24,7 +25,7 @@ class MusicParser(BaseParser):
         self.song_id = None
 
     async def peek(self) -> tuple[str, str]:
-        _, song_name, song_id = get_download_link(self.target, return_song_id=True)
+        _, song_name, song_id = await aget_download_link(self.target, return_song_id=True)
         self.song_id = f"MUSIC{song_id}"
         self.song_name = self._sanitize_filename(song_name)
         return self.song_id, self.song_name
@@ -45,8 +46,9 @@ class MusicParser(BaseParser):
             else:
                 # ③ 下载音频文件
                 logger.info("开始下载 -> %s", self.target)
-                url, download_url = download_single(self.target, output_dir=str(self.save_dir),
-                                                    file_name=f"{self.song_name}.mp3")
+                url, download_url = await asyncio.to_thread(
+                    download_single, self.target, output_dir=str(self.save_dir),
+                    file_name=f"{self.song_name}.mp3")
                 logger.info("下载完成 -> %s", local_path.name)
                 self.result.url = url
                 self.result.download_url = download_url
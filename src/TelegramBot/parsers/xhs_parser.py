@@ -6,7 +6,7 @@ import logging
 import os.path
 from pathlib import Path
 
-from PublicMethods.tools import check_file_size
+from PublicMethods.tools import file_under_bytes, MB
 
 from .base import BaseParser, ParseResult
 from XiaoHongShu.xhs_parser import XiaohongshuPost
@@ -52,7 +52,7 @@ class XiaohongshuParser(BaseParser):
                 if not os.path.exists(video):
                     logger.warning(f"文件不存在 {video}")
                     continue
-                if not check_file_size(video, 50):
+                if not file_under_bytes(video, 50 * MB):
                     logger.warning(f"视频体积超过50MB,无法发送!")
                     self.result.title += f"\n{XIAOHONGSHU_OVER_SIZE}"
                     continue
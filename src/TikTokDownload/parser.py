@@ -163,10 +163,10 @@ class TikTokParser:
         解析出 TikTokImage 列表。
         """
         images: List[TikTokImage] = []
-        raw_images = collect_values(image_post, "images")
+        raw_images = collect_values(image_post, "images", first_only=True)
         title = image_post.get('title')
         for img_item in raw_images:
-            if video := collect_values(img_item, 'video'):
+            if video := collect_values(img_item, 'video', first_only=True):
                 self._parse_video_datas(video)
             # -------- 逐层拿到 urlList --------
             image_url = img_item.get("imageURL", {})  # cover.imageURL
@@ -214,9 +214,9 @@ class TikTokParser:
             # 使用 collect_values 提取 height 和 width
             gear_name = item.get("GearName", "")
             bitrate = item.get("Bitrate", 0)
-            height = collect_values(item, "Height") or 0
-            width = collect_values(item, "Width") or 0
-            raw_bytes = int(collect_values(item, "DataSize"))
+            height = collect_values(item, "Height", first_only=True) or 0
+            width = collect_values(item, "Width", first_only=True) or 0
+            raw_bytes = int(collect_values(item, "DataSize", first_only=True))
             size_mb = round(raw_bytes / (1024 * 1024), 2) if isinstance(raw_bytes, (int, float)) else None
 
             resolution = 0
@@ -250,7 +250,7 @@ class TikTokParser:
         # 对于固定的深层路径，collect_values 也能用，但直接 .get().get() 链式调用也同样清晰。
         # 真正优势体现在 target_key 可能出现在不同父级路径下，或者需要扁平化收集多个值时。
         # 这里主要将视频封面图的提取进行优化。
-        item_struct = collect_values(universal_data, 'itemStruct')
+        item_struct = collect_values(universal_data, 'itemStruct', first_only=True)
 
         if not item_struct:
             log.error("在 __UNIVERSAL_DATA_FOR_REHYDRATION__ 中未找到 itemStruct。")
@@ -318,11 +318,10 @@ class TikTokParser:
         """
         p = PlaywrightManager
         p.set_default_fingerprint()
-        context = await p.new_cookie_context(headless=True)
-        page = await context.new_page()
-        log.debug(f"short url: {short_url}")
         url = self.get_final_url(short_url)  # type:httpx.URL
-        try:
+        async with p.acquire_context(headless=True, with_cookie=True, storage_key="tiktok") as context:
+            page = await context.new_page()
+            log.debug(f"short url: {short_url}")
             # 过滤静态资源，提高加载速度
             await page.route(
                 "**/*",
@@ -345,7 +344,7 @@ class TikTokParser:
             except Exception as e:
                 log.error(f"解析 JSON 失败: {e}")
                 raise Exception("解析 API JSON 失败。")
-            item_struct = collect_values(detail_json, "itemStruct")
+            item_struct = collect_values(detail_json, "itemStruct", first_only=True)
             aweme_id = item_struct.get("id")
             desc = item_struct.get("desc", "")
             create_time = item_struct.get("createTime", 0)  # Unix timestamp
@@ -381,6 +380,3 @@ class TikTokParser:
                 comment_count=statistics_data.get("commentCount"),
                 share_count=statistics_data.get("shareCount"),
             )
-
-        finally:
-            await context.close()
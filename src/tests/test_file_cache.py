@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+file_id 缓存测试用例
+验证快照 + 增量日志的持久化：日志重放、压实后继续追加再重放、日志末尾残缺行
+"""
+import pytest
+
+from TelegramBot import file_cache
+
+
+@pytest.fixture
+def cache_files(tmp_path, monkeypatch):
+    """快照与日志写到临时目录，用例结束前把定时器中的修改落盘，避免写回真实缓存文件"""
+    monkeypatch.setattr(file_cache, "CACHE_FILE", tmp_path / "file_id_cache.json")
+    monkeypatch.setattr(file_cache, "LOG_FILE", tmp_path / "file_id_cache.log")
+    file_cache.load()
+    yield tmp_path
+    file_cache._checkpoint()
+    if file_cache._flush_timer is not None:
+        file_cache._flush_timer.cancel()
+    if file_cache._checkpoint_timer is not None:
+        file_cache._checkpoint_timer.cancel()
+
+
+def _reload() -> dict:
+    """模拟重启：从磁盘重新加载，返回 {key: value}"""
+    file_cache.load()
+    return {k: file_cache.get(k) for k in file_cache.keys()}
+
+
+class TestFileCache:
+    """file_id 缓存持久化测试"""
+
+    def test_01_log_replay_without_snapshot(self, cache_files):
+        """测试1: 只有增量日志时，重启后按顺序重放出 put/delete 结果"""
+        file_cache.put("a", "file_a", title="A")
+        file_cache.put("b", "file_b")
+        file_cache._flush()
+        file_cache.put("a", "file_a2")
+        file_cache.delete("b")
+        file_cache._flush()
+
+        assert not file_cache.CACHE_FILE.exists()
+        assert file_cache.LOG_FILE.exists()
+        assert _reload() == {"a": "file_a2"}
+        assert file_cache.get_title("a") == "A"
+
+    def test_02_replay_after_compaction(self, cache_files):
+        """测试2: 压实成快照后继续追加日志，重启时日志在新快照上重放"""
+        file_cache.put("a", "file_a")
+        file_cache.put("b", ["file_b1", "file_b2"])
+        file_cache._flush()
+        file_cache.save()
+        assert file_cache.CACHE_FILE.exists()
+        assert not file_cache.LOG_FILE.exists()
+
+        file_cache.put("c", "file_c")
+        file_cache.delete("a")
+        file_cache._flush()
+        assert file_cache.LOG_FILE.exists()
+
+        assert _reload() == {"b": ["file_b1", "file_b2"], "c": "file_c"}
+
+    def test_03_auto_compact_when_log_too_large(self, cache_files, monkeypatch):
+        """测试3: 日志超过阈值时 flush 自动压实，压实后数据不丢"""
+        monkeypatch.setattr(file_cache, "COMPACT_MIN_BYTES", 0)
+        file_cache.put("a", "file_a")
+        file_cache._flush()
+
+        assert file_cache.CACHE_FILE.exists()
+        assert not file_cache.LOG_FILE.exists()
+        assert _reload() == {"a": "file_a"}
+
+    def test_04_truncated_log_tail_ignored(self, cache_files):
+        """测试4: 日志末尾写了一半的记录被忽略，之后追加的记录不会拼到残行上"""
+        file_cache.put("a", "file_a")
+        file_cache._flush()
+        with file_cache.LOG_FILE.open("ab") as f:
+            f.write(b'{"op":"put","k":"b","v":')
+
+        assert _reload() == {"a": "file_a"}
+
+        file_cache.put("c", "file_c")
+        file_cache._flush()
+        assert _reload() == {"a": "file_a", "c": "file_c"}
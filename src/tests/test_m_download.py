@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""
+多线程下载器测试用例
+在本地 HTTP 服务上验证分片下载：正常 206、服务器忽略 Range 返回 200、分片响应被截断后重试
+"""
+import os
+import re
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+from PublicMethods.m_download import Downloader, SegmentDownloader, RANGE_CHUNK_SIZE
+
+# 略大于两个区间，切出三个分片，最后一片不满
+DATA = os.urandom(2 * RANGE_CHUNK_SIZE + 12345)
+# 小于 2MB，走单线程下载
+SMALL_DATA = DATA[:512 * 1024]
+
+
+class _RangeHandler(BaseHTTPRequestHandler):
+    """
+    按路径模拟不同服务器：
+    /range   正常支持 Range，返回 206
+    /norange 忽略 Range，一律返回 200 与完整文件
+    /liar    只对探测请求 (bytes=0-0) 返回 206，真正的分片请求返回 200 完整文件
+    /short   支持 Range，但每个区间第一次响应只有一半数据（Content-Length 也按一半声明）
+    /reset   支持 Range，但每个区间第一次响应声明完整长度，只发一半数据就断开
+    /small   支持 Range 的小文件
+    """
+    protocol_version = "HTTP/1.1"
+    truncated_starts: set = set()
+    statuses: list = []
+    lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def do_HEAD(self):
+        with self.lock:
+            self.statuses.append((self.path, "HEAD", 200))
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(DATA)))
+        self.end_headers()
+
+    def do_GET(self):
+        data = SMALL_DATA if self.path == "/small" else DATA
+        rng = self.headers.get("Range")
+        if self.path == "/norange" or (self.path == "/liar" and rng != "bytes=0-0"):
+            rng = None
+        if not rng:
+            self._send(200, data)
+            return
+
+        m = re.match(r"bytes=(\d+)-(\d+)", rng)
+        start, end = int(m[1]), min(int(m[2]), len(data) - 1)
+        chunk = data[start:end + 1]
+        truncate = False
+        if self.path in ("/short", "/reset") and rng != "bytes=0-0":
+            with self.lock:
+                truncate = start not in self.truncated_starts
+                self.truncated_starts.add(start)
+        if truncate and self.path == "/short":
+            chunk = chunk[:len(chunk) // 2]
+            truncate = False
+        self._send(206, chunk, content_range=f"bytes {start}-{end}/{len(data)}", truncate=truncate)
+
+    def _send(self, status, body, content_range=None, truncate=False):
+        with self.lock:
+            self.statuses.append((self.path, self.headers.get("Range"), status))
+        self.send_response(status)
+        if content_range:
+            self.send_header("Content-Range", content_range)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Accept-Ranges", "bytes")
+        self.end_headers()
+        if truncate:
+            # 声明了完整长度却只发一半，随即断开连接
+            self.wfile.write(body[:len(body) // 2])
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+
+@pytest.fixture(scope="module")
+def server():
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), _RangeHandler)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{srv.server_address[1]}"
+    srv.shutdown()
+    srv.server_close()
+
+
+@pytest.fixture(autouse=True)
+def reset_handler(monkeypatch):
+    """每个用例独立统计请求；重试不等待退避"""
+    _RangeHandler.statuses = []
+    _RangeHandler.truncated_starts = set()
+    monkeypatch.setattr(SegmentDownloader, "_backoff_delay", staticmethod(lambda *args, **kwargs: 0))
+
+
+def _range_requests(path):
+    """某路径下除探测请求以外的 Range 请求 (range, status)"""
+    return [(rng, status) for p, rng, status in _RangeHandler.statuses
+            if p == path and rng and rng not in ("bytes=0-0", "HEAD")]
+
+
+def _head_requests(path):
+    return [p for p, rng, _ in _RangeHandler.statuses if p == path and rng == "HEAD"]
+
+
+class TestSegmentedDownload:
+    """分片下载测试"""
+
+    def _download(self, server, tmp_path, path):
+        out = tmp_path / "out.bin"
+        with Downloader(threads=4) as d:
+            result = d.download(f"{server}{path}", str(out), timeout=30)
+        assert result == str(out)
+        return out
+
+    def test_01_range_download_206(self, server, tmp_path):
+        """测试1: 服务器支持 Range 时按区间多线程下载，内容完整"""
+        out = self._download(server, tmp_path, "/range")
+
+        assert out.read_bytes() == DATA
+        requests_made = _range_requests("/range")
+        assert len(requests_made) == 3
+        assert all(status == 206 for _, status in requests_made)
+        assert not (tmp_path / "out.bin.part").exists()
+
+    def test_02_server_without_range_200(self, server, tmp_path):
+        """测试2: 探测请求返回 200 时直接单线程下载，不发分片请求"""
+        out = self._download(server, tmp_path, "/norange")
+
+        assert out.read_bytes() == DATA
+        assert _range_requests("/norange") == []
+        # 探测已拿到最终 URL，单线程下载不再额外发 HEAD
+        assert _head_requests("/norange") == []
+
+    def test_03_range_ignored_falls_back(self, server, tmp_path):
+        """测试3: 分片请求收到 200 完整文件时不按偏移写入，回退单线程后内容仍正确"""
+        out = self._download(server, tmp_path, "/liar")
+
+        assert out.read_bytes() == DATA
+        # 每个分片收到 200 后立即放弃，不重试
+        requests_made = _range_requests("/liar")
+        assert requests_made and all(status == 200 for _, status in requests_made)
+        assert len(requests_made) <= 3
+        assert not (tmp_path / "out.bin.part").exists()
+        assert _head_requests("/liar") == []
+
+    @pytest.mark.parametrize("path", ["/short", "/reset"])
+    def test_04_short_read_retried(self, server, tmp_path, path):
+        """测试4: 分片响应不足区间大小（正常结束或中途断开）时重试该区间，成品不含截断数据"""
+        out = self._download(server, tmp_path, path)
+
+        assert out.read_bytes() == DATA
+        requests_made = _range_requests(path)
+        # 三个区间各截断一次、重试一次
+        assert len(requests_made) == 6
+        assert len({rng for rng, _ in requests_made}) == 3
+
+    def test_05_small_file_single_request(self, server, tmp_path):
+        """测试5: 小文件探测后直接单线程下载，只有探测与下载两次请求，不发 HEAD"""
+        out = self._download(server, tmp_path, "/small")
+
+        assert out.read_bytes() == SMALL_DATA
+        assert _head_requests("/small") == []
+        assert len([p for p, _, _ in _RangeHandler.statuses if p == "/small"]) == 2
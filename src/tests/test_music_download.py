@@ -17,6 +17,13 @@ from MusicDownload.download import download_single
 from MusicDownload.fetch_music_list import fetch_song_urls_via_api
 
 
+@pytest.fixture(autouse=True)
+def isolated_music_cache(tmp_path, monkeypatch):
+    """下载链接缓存写到临时目录，避免用例之间互相命中"""
+    monkeypatch.setattr("MusicDownload.cache.CACHE_DIR", tmp_path)
+    monkeypatch.setattr("MusicDownload.cache.CACHE_FILE", tmp_path / "music")
+
+
 class TestMusicDownloadCore:
     """网易云音乐下载核心功能测试"""
     
@@ -27,15 +34,16 @@ class TestMusicDownloadCore:
     
     # 模拟的API响应数据
     MOCK_SONG_RESPONSE = {
-        "code": 200,
-        "data": {
+        "status": 200,
+        "url_info": {
             "url": "https://music-download-url.mp3?vuutv=12345",
-            "title": "测试歌曲标题",
-            "artist": "测试歌手",
-            "album": "测试专辑",
-            "duration": 240000,  # 4分钟，毫秒
             "size": 5242880,    # 5MB，字节
-            "bit_rate": 320000   # 320kbps
+            "bitrate": 320000   # 320kbps
+        },
+        "song_info": {
+            "name": "测试歌曲标题",
+            "artist": "测试歌手",
+            "album": "测试专辑"
         }
     }
     
@@ -56,7 +64,7 @@ class TestMusicDownloadCore:
     
     def test_01_get_download_link_success(self):
         """测试1: 测试成功获取歌曲下载链接"""
-        with patch('requests.post') as mock_post:
+        with patch('MusicDownload.download_music.API_SESSION.post') as mock_post:
             # 设置mock响应
             mock_response = Mock()
             mock_response.status_code = 200
@@ -68,8 +76,9 @@ class TestMusicDownloadCore:
             
             # 验证结果
             assert result is not None
-            assert "music-download-url.mp3" in result
-            assert "vuutv=" in result  # 包含验证参数
+            download_url, song_name = result
+            assert "music-download-url.mp3" in download_url
+            assert "vuutv=" in download_url  # 包含验证参数
             
             # 验证API被正确调用
             mock_post.assert_called_once()
@@ -78,7 +87,7 @@ class TestMusicDownloadCore:
     
     def test_02_get_download_link_with_song_id_return(self):
         """测试2: 测试获取下载链接并返回歌曲ID"""
-        with patch('requests.post') as mock_post:
+        with patch('MusicDownload.download_music.API_SESSION.post') as mock_post:
             # 设置mock响应
             mock_response = Mock()
             mock_response.status_code = 200
@@ -104,7 +113,7 @@ class TestMusicDownloadCore:
     
     def test_04_get_download_link_api_error(self):
         """测试4: 测试API错误响应的处理"""
-        with patch('requests.post') as mock_post:
+        with patch('MusicDownload.download_music.API_SESSION.post') as mock_post:
             # 设置mock响应 - API错误
             mock_response = Mock()
             mock_response.status_code = 200
@@ -119,7 +128,7 @@ class TestMusicDownloadCore:
     
     def test_05_get_download_link_network_error(self):
         """测试5: 测试网络错误的处理"""
-        with patch('requests.post') as mock_post:
+        with patch('MusicDownload.download_music.API_SESSION.post') as mock_post:
             # 设置网络异常
             mock_post.side_effect = Exception("网络连接错误")
             
@@ -146,11 +155,12 @@ class TestMusicDownloadCore:
                 assert song_id == "1234567890"
     
     @patch('builtins.open', new_callable=mock_open)
-    @patch('requests.get')
+    @patch('MusicDownload.download_music.SESSION.get')
     def test_07_download_file_success(self, mock_get, mock_file, temp_dir):
         """测试7: 测试成功下载文件"""
         # 设置mock响应
-        mock_response = Mock()
+        mock_response = MagicMock()
+        mock_response.__enter__.return_value = mock_response  # SESSION.get 以 with 方式使用
         mock_response.status_code = 200
         mock_response.iter_content.return_value = [b'music_content_chunk_1', b'music_content_chunk_2']
         mock_response.headers = {'Content-Length': '1024'}
@@ -173,7 +183,7 @@ class TestMusicDownloadCore:
         handle = mock_file()
         assert handle.write.call_count >= 2  # 写入了多个数据块
     
-    @patch('requests.get')
+    @patch('MusicDownload.download_music.SESSION.get')
     def test_08_download_file_network_error(self, mock_get, temp_dir):
         """测试8: 测试下载时网络错误处理"""
         # 设置网络异常
@@ -187,11 +197,12 @@ class TestMusicDownloadCore:
         with pytest.raises(Exception):
             download_file(download_url, output_path)
     
-    @patch('requests.get')
+    @patch('MusicDownload.download_music.SESSION.get')
     def test_09_download_file_http_error(self, mock_get, temp_dir):
         """测试9: 测试下载时HTTP错误处理"""
         # 设置HTTP错误响应
-        mock_response = Mock()
+        mock_response = MagicMock()
+        mock_response.__enter__.return_value = mock_response
         mock_response.status_code = 404
         mock_response.raise_for_status.side_effect = Exception("404 Not Found")
         mock_get.return_value = mock_response
@@ -568,25 +579,23 @@ class TestMusicDownloadIntegration:
     @pytest.mark.integration
     def test_24_complete_download_workflow(self, temp_dir):
         """测试24: 完整下载工作流程模拟"""
-        with patch('requests.post') as mock_post, \
-             patch('requests.get') as mock_get, \
+        with patch('MusicDownload.download_music.API_SESSION.post') as mock_post, \
+             patch('MusicDownload.download_music.SESSION.get') as mock_get, \
              patch('builtins.open', mock_open(read_data=b'mock_music_content')):
             
             # 设置获取下载链接的mock
             mock_api_response = Mock()
             mock_api_response.status_code = 200
             mock_api_response.json.return_value = {
-                "code": 200,
-                "data": {
-                    "url": "https://music-download-url.mp3?vuutv=12345",
-                    "title": "完整流程测试歌曲",
-                    "artist": "测试歌手"
-                }
+                "status": 200,
+                "url_info": {"url": "https://music-download-url.mp3?vuutv=12345"},
+                "song_info": {"name": "完整流程测试歌曲", "artist": "测试歌手"}
             }
             mock_post.return_value = mock_api_response
             
             # 设置文件下载的mock
-            mock_download_response = Mock()
+            mock_download_response = MagicMock()
+            mock_download_response.__enter__.return_value = mock_download_response
             mock_download_response.status_code = 200
             mock_download_response.iter_content.return_value = [b'music_content']
             mock_download_response.headers = {'Content-Length': '1024'}